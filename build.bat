@@ -1 +1,2 @@
+python src/atlas.py ./assets
 pyinstaller --onefile --add-data "./data;./data" --add-data "./key;./key" --add-data "./assets;./assets" --paths "src" src/main.py
@@ -0,0 +1,323 @@
+import os
+from collections import OrderedDict
+from hashlib import sha1
+from json import load, dump
+from shutil import rmtree
+from threading import Lock
+
+import pygame
+
+from config import BAKE_PATH, BAKE_HASH
+import atlas as atl
+
+def normalizeScale(
+    scale_fact : int | float | tuple[float, float],
+) -> tuple[float, float]:
+    if isinstance(scale_fact, (int, float)):
+        scale_fact = (scale_fact, scale_fact)
+    return (float(scale_fact[0]), float(scale_fact[1]))
+
+def isIntegerScale(
+    scale_fact : int | float | tuple[float, float],
+) -> bool:
+    return all(fact.is_integer() for fact in normalizeScale(scale_fact))
+
+def isDisplayReady() -> bool:
+    return pygame.display.get_surface() is not None
+
+def convertSurface(
+    surface : pygame.Surface,
+    alpha : bool = True,
+) -> pygame.Surface:
+    # converte nel formato del display, se gia' inizializzato
+    if not isDisplayReady():
+        return surface
+    if alpha:
+        return surface.convert_alpha()
+    return surface.convert()
+
+class BakeCache:
+    def __init__(
+        self,
+        path : str,
+        bake_hash : str,
+    ) -> None:
+        self._path = path
+        self._bake_hash = bake_hash
+        self._ready : bool | None = None
+
+    def _isValid(
+        self,
+        path : str,
+    ) -> bool:
+        try:
+            with open(f"{path}/bake.json") as manifest:
+                return load(manifest).get("bake") == self._bake_hash
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def _prune(self) -> None:
+        # le cartelle cotte per un'altra risoluzione o per asset
+        # ormai cambiati non verrebbero piu' lette
+        root = os.path.dirname(self._path)
+        for name in os.listdir(root):
+            path = f"{root}/{name}"
+            if (path != self._path
+                and os.path.isfile(f"{path}/bake.json")
+                and not self._isValid(path)):
+                rmtree(path, ignore_errors=True)
+
+    def _prepare(self) -> bool:
+        # alla prima esecuzione, o se risoluzione o asset sono cambiati,
+        # i file cotti vengono rigenerati
+        if self._ready is not None:
+            return self._ready
+        manifest_path = f"{self._path}/bake.json"
+        try:
+            os.makedirs(self._path, exist_ok=True)
+            self._prune()
+            if not self._isValid(self._path):
+                for file in os.listdir(self._path):
+                    if file.endswith(".bmp"):
+                        os.remove(f"{self._path}/{file}")
+                with open(manifest_path, "w") as manifest:
+                    dump({"bake" : self._bake_hash}, manifest)
+            self._ready = True
+        except OSError:
+            self._ready = False
+        return self._ready
+
+    def _getFile(
+        self,
+        key : tuple,
+    ) -> str:
+        # le sorgenti cambiate svuotano gia' la cartella (BAKE_HASH):
+        # basta il percorso con la scala, senza aprire il file
+        digest = sha1(repr(key).encode("utf-8"))
+        return f"{self._path}/{digest.hexdigest()}.bmp"
+
+    def load(
+        self,
+        key : tuple,
+    ) -> pygame.Surface | None:
+        if not self._prepare():
+            return None
+        try:
+            return pygame.image.load(self._getFile(key))
+        except (FileNotFoundError, pygame.error):
+            return None
+
+    def save(
+        self,
+        key : tuple,
+        surface : pygame.Surface,
+    ) -> None:
+        if not self._prepare():
+            return
+        try:
+            file = self._getFile(key)
+            # scrittura atomica: il prefetch puo' cuocere lo stesso file
+            tmp_file = f"{file[:-4]}.{os.getpid()}.{id(surface)}.tmp.bmp"
+            pygame.image.save(surface, tmp_file)
+            os.replace(tmp_file, file)
+        except (OSError, pygame.error):
+            pass
+
+class SurfaceCache:
+    def __init__(
+        self,
+        max_unused : int = 128,
+        bake : BakeCache | None = None,
+    ) -> None:
+        self._surfaces : dict[tuple, pygame.Surface] = {}
+        self._refs : dict[tuple, int] = {}
+        self._alpha : dict[tuple, bool] = {}
+        self._converted : set[tuple] = set()
+        # superfici senza riferimenti, dalla meno alla piu' recente
+        self._unused : OrderedDict[tuple, None] = OrderedDict()
+        self._max_unused = max_unused
+        self._bake = bake
+        # il prefetch carica da un altro thread
+        self._lock = Lock()
+
+    def _getKey(
+        self,
+        path : str,
+        scale_fact : int | float | tuple[float, float],
+    ) -> tuple:
+        return (path, normalizeScale(scale_fact))
+
+    def _convert(
+        self,
+        key : tuple,
+    ) -> pygame.Surface:
+        surface = self._surfaces[key]
+        if (key not in self._converted) and isDisplayReady():
+            surface = convertSurface(surface, self._alpha[key])
+            self._surfaces[key] = surface
+            self._converted.add(key)
+        return surface
+
+    def _loadSource(
+        self,
+        path : str,
+        source : tuple[str, list[int]] | None,
+    ) -> pygame.Surface:
+        if source is None:
+            return pygame.image.load(path)
+        # il fotogramma si ritaglia dall'atlante non scalato e si scala
+        # da solo, con gli stessi arrotondamenti del file singolo
+        sheet_path, rect = source
+        sheet_key = self._getKey(sheet_path, 1)
+        self._acquire(sheet_key, True)
+        try:
+            with self._lock:
+                sheet = self._surfaces[sheet_key]
+            return sheet.subsurface(rect)
+        finally:
+            self.release(sheet_path, 1)
+
+    def _decode(
+        self,
+        key : tuple,
+        source : tuple[str, list[int]] | None = None,
+    ) -> pygame.Surface:
+        if key[1] == (1, 1) and source is None:
+            return pygame.image.load(key[0])
+        if self._bake is not None:
+            surface = self._bake.load(key)
+            if surface is not None:
+                return surface
+        surface = self._loadSource(key[0], source)
+        surface = pygame.transform.scale_by(surface, key[1])
+        if self._bake is not None:
+            self._bake.save(key, surface)
+        return surface
+
+    def _acquire(
+        self,
+        key : tuple,
+        alpha : bool,
+        source : tuple[str, list[int]] | None = None,
+    ) -> None:
+        with self._lock:
+            if key in self._surfaces:
+                self._unused.pop(key, None)
+                self._refs[key] += 1
+                return
+        surface = self._decode(key, source)
+        with self._lock:
+            if key not in self._surfaces:
+                self._surfaces[key] = surface
+                self._refs[key] = 0
+                self._alpha[key] = alpha
+            else:
+                self._unused.pop(key, None)
+            self._refs[key] += 1
+
+    def load(
+        self,
+        path : str,
+        scale_fact : int | float | tuple[float, float] = 1,
+        alpha : bool = True,
+        source : tuple[str, list[int]] | None = None,
+    ) -> pygame.Surface:
+        key = self._getKey(path, scale_fact)
+        self._acquire(key, alpha, source)
+        with self._lock:
+            return self._convert(key)
+
+    def prefetch(
+        self,
+        path : str,
+        scale_fact : int | float | tuple[float, float] = 1,
+        alpha : bool = True,
+    ) -> None:
+        # decodifica e scala senza convertire: la conversione
+        # avviene nel thread principale al primo load
+        self._acquire(self._getKey(path, scale_fact), alpha)
+
+    def convertAll(self) -> None:
+        with self._lock:
+            for key in list(self._surfaces):
+                self._convert(key)
+
+    def release(
+        self,
+        path : str,
+        scale_fact : int | float | tuple[float, float] = 1,
+    ) -> None:
+        key = self._getKey(path, scale_fact)
+        with self._lock:
+            if key not in self._refs:
+                return
+            self._refs[key] -= 1
+            if self._refs[key] <= 0:
+                self._refs[key] = 0
+                self._unused[key] = None
+                self._evict()
+
+    def _evict(self) -> None:
+        while len(self._unused) > self._max_unused:
+            key, _ = self._unused.popitem(last=False)
+            del self._surfaces[key]
+            del self._refs[key]
+            del self._alpha[key]
+            self._converted.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._surfaces.clear()
+            self._refs.clear()
+            self._alpha.clear()
+            self._converted.clear()
+            self._unused.clear()
+
+CACHE = SurfaceCache(bake=BakeCache(BAKE_PATH, BAKE_HASH))
+
+class AssetGroup:
+    def __init__(
+        self,
+        cache : SurfaceCache = CACHE,
+    ) -> None:
+        self._cache = cache
+        self._keys : list[tuple[str, int | float | tuple[float, float]]] = []
+
+    def load(
+        self,
+        path : str,
+        scale_fact : int | float | tuple[float, float] = 1,
+        alpha : bool = True,
+        source : tuple[str, list[int]] | None = None,
+    ) -> pygame.Surface:
+        surface = self._cache.load(path, scale_fact, alpha, source)
+        self._keys.append((path, scale_fact))
+        return surface
+
+    def loadFrame(
+        self,
+        directory : str,
+        name : str,
+        scale_fact : int | float | tuple[float, float] = 1,
+        alpha : bool = True,
+    ) -> pygame.Surface:
+        rect = atl.getFrameRect(directory, name)
+        path = f"{directory}/{name}.png"
+        if rect is None:
+            return self.load(path, scale_fact, alpha)
+        sheet_path = f"{directory}/{atl.ATLAS_NAME}.png"
+        if isIntegerScale(scale_fact):
+            # a scala intera l'atlante scalato coincide con i fotogrammi
+            # scalati uno per uno: il fotogramma e' una sua vista
+            sheet = self.load(sheet_path, scale_fact, alpha)
+            return sheet.subsurface(
+                atl.scaleRect(rect, normalizeScale(scale_fact), sheet.get_size())
+            )
+        # a scale non intere scalare l'atlante intero sposterebbe i bordi
+        # dei fotogrammi: si scala il singolo fotogramma
+        return self.load(path, scale_fact, alpha, (sheet_path, rect))
+
+    def release(self) -> None:
+        for path, scale_fact in self._keys:
+            self._cache.release(path, scale_fact)
+        self._keys = []
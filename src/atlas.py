@@ -0,0 +1,122 @@
+import os
+import sys
+from json import load, dump
+
+import pygame
+
+ATLAS_NAME = "atlas"
+PADDING = 2
+
+# cartelle che contengono i fotogrammi di un'entita', con le sottocartelle
+# da lasciare fuori dall'atlante: l'icona di armi e incantesimi resta
+# residente e non deve tenere in memoria i fotogrammi dell'attacco
+ATLAS_DIRS = {
+    "sprites/*" : (),
+    "weapons/*" : ("static",),
+    "spells" : ("static",),
+}
+
+_indexes : dict[str, dict[str, list[int]] | None] = {}
+
+def _getFrames(
+    directory : str,
+    excluded : tuple[str, ...] = (),
+) -> list[str]:
+    frames = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            name, ext = os.path.splitext(file)
+            if ext != ".png" or (root == directory and name == ATLAS_NAME):
+                continue
+            rel_path = os.path.relpath(os.path.join(root, name), directory)
+            rel_path = rel_path.replace(os.sep, "/")
+            if any(part in excluded for part in rel_path.split("/")):
+                continue
+            frames.append(rel_path)
+    return sorted(frames)
+
+def _pack(
+    sizes : dict[str, tuple[int, int]],
+) -> tuple[tuple[int, int], dict[str, list[int]]]:
+    # impacchettamento a scaffali, dal fotogramma piu' alto al piu' basso
+    area = sum((w+PADDING)*(h+PADDING) for w, h in sizes.values())
+    width = max(
+        max(w for w, _ in sizes.values()) + PADDING,
+        int(area**0.5) + 1,
+    )
+    index = {}
+    x = y = shelf_height = 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], name)):
+        w, h = sizes[name]
+        if x + w + PADDING > width:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        index[name] = [x, y, w, h]
+        x += w + PADDING
+        shelf_height = max(shelf_height, h + PADDING)
+    return ((width, y + shelf_height), index)
+
+def buildAtlas(
+    directory : str,
+    excluded : tuple[str, ...] = (),
+) -> int:
+    frames = _getFrames(directory, excluded)
+    if not frames:
+        return 0
+    surfaces = {
+        name : pygame.image.load(f"{directory}/{name}.png") for name in frames
+    }
+    size, index = _pack(
+        {name : surface.get_size() for name, surface in surfaces.items()}
+    )
+    sheet = pygame.Surface(size, pygame.SRCALPHA)
+    for name, surface in surfaces.items():
+        sheet.blit(surface, index[name][:2])
+    pygame.image.save(sheet, f"{directory}/{ATLAS_NAME}.png")
+    with open(f"{directory}/{ATLAS_NAME}.json", "w") as index_file:
+        dump(index, index_file, indent=4)
+    return len(frames)
+
+def buildAll(assets_path : str) -> None:
+    for pattern, excluded in ATLAS_DIRS.items():
+        parent, _, child = pattern.partition("/")
+        if child == "*":
+            directories = sorted(
+                f"{assets_path}/{parent}/{name}"
+                for name in os.listdir(f"{assets_path}/{parent}")
+            )
+        else:
+            directories = [f"{assets_path}/{parent}"]
+        for directory in directories:
+            count = buildAtlas(directory, excluded)
+            print(f"{directory}: {count} fotogrammi")
+
+def getFrameRect(
+    directory : str,
+    name : str,
+) -> list[int] | None:
+    if directory not in _indexes:
+        try:
+            with open(f"{directory}/{ATLAS_NAME}.json") as index_file:
+                _indexes[directory] = load(index_file)
+        except FileNotFoundError:
+            _indexes[directory] = None
+    index = _indexes[directory]
+    if index is None:
+        return None
+    return index.get(name)
+
+def scaleRect(
+    rect : list[int],
+    scale_fact : tuple[float, float],
+    sheet_size : tuple[int, int],
+) -> pygame.Rect:
+    left = int(rect[0]*scale_fact[0])
+    top = int(rect[1]*scale_fact[1])
+    right = min(int((rect[0] + rect[2])*scale_fact[0]), sheet_size[0])
+    bottom = min(int((rect[1] + rect[3])*scale_fact[1]), sheet_size[1])
+    return pygame.Rect(left, top, right - left, bottom - top)
+
+if __name__ == "__main__":
+    buildAll(sys.argv[1] if len(sys.argv) > 1 else "./assets")
@@ -3,6 +3,8 @@ from typing import Literal
 import pygame
 
 from config import X_RATIO, Y_RATIO, ASSETS_PATH
+import assets as ats
+import combat as cb
 import weapons as wp
 import textboxes as tbx
 
@@ -27,8 +29,10 @@ class Character:
 		self.has_collision = has_collision
 		self.is_hostile = is_hostile
 		self.collision_type = ""
+		self._assets = ats.AssetGroup()
 		self._setSprites()
 		self.collision_rect = self.rect = self._static_right.get_rect()
+		self.draw_rect = self.rect.copy()
 		self._name_box = tbx.TextBox(
 			f"{self.name}",
 			align = "center",
@@ -80,40 +84,35 @@ class Character:
 		
 
 	def _setSprites(self) -> None:
-		self._static_right = pygame.image.load(
-			f"{self.path}/static/static_right.png"
+		self._static_right = self._assets.loadFrame(
+			self.path, "static/static_right", self.scale_fact
 		)
-		self._static_right = pygame.transform.scale_by(
-			self._static_right, self.scale_fact
-		)
-		self._static_left = pygame.image.load(
-			f"{self.path}/static/static_left.png"
-		)
-		self._static_left = pygame.transform.scale_by(
-			self._static_left, self.scale_fact
+		self._static_left = self._assets.loadFrame(
+			self.path, "static/static_left", self.scale_fact
 		)
 		self._right_idle = []
 		self._left_idle = []
 		for i in range(self.max_frames):
 			self._right_idle.append(
-				pygame.image.load(
-					f"{self.path}/right_idle/{i}.png"
+				self._assets.loadFrame(
+					self.path, f"right_idle/{i}", self.scale_fact
 				)
 			)
-			self._right_idle[i] = pygame.transform.scale_by(
-				self._right_idle[i], self.scale_fact
-			)
 			self._left_idle.append(
-				pygame.image.load(
-					f"{self.path}/left_idle/{i}.png"
+				self._assets.loadFrame(
+					self.path, f"left_idle/{i}", self.scale_fact
 				)
 			)
-			self._left_idle[i] = pygame.transform.scale_by(
-				self._left_idle[i], self.scale_fact
-			)
 		self._current_anim = self._right_idle
 		self._current_rot = self._static_right
 
+	def release(self) -> None:
+		self._assets.release()
+		self._name_box.release()
+		if self.has_dialogue:
+			for dialogue in self._dialogue:
+				dialogue.release()
+
 	def setPos(
 		self, 
 		screen : pygame.Surface, 
@@ -125,7 +124,25 @@ class Character:
 		else:
 			self._current_rot = self._static_left
 		self.collision_rect.center = self.rect.center = pos
-		screen.blit(self._current_rot, self.rect)
+		self.draw_rect = screen.blit(self._current_rot, self.rect)
+
+	def getFootprint(self) -> pygame.Rect:
+		# area coperta da qualsiasi fotogramma, fermo o animato
+		frames = (
+			[self._static_right, self._static_left]
+			+ self._right_idle + self._left_idle
+		)
+		return pygame.Rect(
+			self.rect.topleft,
+			(max(frame.get_width() for frame in frames),
+			 max(frame.get_height() for frame in frames)),
+		)
+
+	def getAnimFrame(
+		self,
+		frame : int,
+	) -> int:
+		return (frame // self.frame_mult)  % self.max_frames
 		
 	def idle(
 		self, 
@@ -138,9 +155,9 @@ class Character:
 		else:
 			self._current_anim = self._left_idle
 		
-		anim_frame = (frame // self.frame_mult)  % self.max_frames
+		anim_frame = self.getAnimFrame(frame)
 		
-		screen.blit(self._current_anim[anim_frame], self.rect)
+		self.draw_rect = screen.blit(self._current_anim[anim_frame], self.rect)
 	
 class NPC(Character):
 	def __init__(
@@ -208,16 +225,14 @@ class Enemy(Character):
 		self,
 		damage : int,
 	) -> None:
-		if self.hp > damage:
-			self.hp -= damage
-		else:
-			self.hp = 0
-			self.is_dead = True
+		cb.applyDamage(self, damage)
+		if self.is_dead:
 			self.is_hostile = False
 
-	def cure(self) -> None:
-		new_hp = round(self.hp + (self.max_hp * 0.2)) 
-		self.hp = min(new_hp, self.max_hp)
+	def release(self) -> None:
+		Character.release(self)
+		for attack in self.weapons + self.spells:
+			attack.release()
 			
 class Subplayer(Character):
 	def __init__(
@@ -252,6 +267,11 @@ class Subplayer(Character):
 			wp.CLASSES[spell["class"]](**spell["args"]) for spell in spells
 		]
 
+	def release(self) -> None:
+		Character.release(self)
+		for attack in self.weapons + self.spells:
+			attack.release()
+
 CLASSES = {
 	"Character" : Character,
 	"Subplayer" : Subplayer,
@@ -0,0 +1,265 @@
+from dataclasses import dataclass, field
+from random import randint
+
+# moltiplicatore dei danni su un nemico debole all'effetto
+WEAK_MULT = 1.5
+# moltiplicatore dei danni con l'arma della propria classe
+BUFF_MULT = 1.5
+CURE_RATIO = 0.2
+
+@dataclass
+class Attack:
+    name : str
+    type : str
+    damage : int
+    crit : int = 0
+    effect : str | None = None
+    mana : int = 0
+    is_spell : bool = False
+    critical : bool = False
+
+    @classmethod
+    def fromData(cls, data : dict) -> "Attack":
+        args = data["args"]
+        return cls(
+            name = args["name"],
+            type = args["type"],
+            damage = args["damage"],
+            crit = args.get("crit", 0),
+            effect = args.get("effect"),
+            mana = args.get("mana", 0),
+            is_spell = data["class"] in ("Spell", "PlayerSpell"),
+        )
+
+@dataclass
+class Combatant:
+    name : str
+    type : str
+    level : int
+    max_hp : int
+    max_mana : int
+    weakness : list[str] = field(default_factory=list)
+    weapons : list[Attack] = field(default_factory=list)
+    spells : list[Attack] = field(default_factory=list)
+    hp : int | None = None
+    mana : int | None = None
+    is_dead : bool = False
+
+    def __post_init__(self) -> None:
+        if self.hp is None:
+            self.hp = self.max_hp
+        if self.mana is None:
+            self.mana = self.max_mana
+
+    @classmethod
+    def fromData(cls, args : dict) -> "Combatant":
+        return cls(
+            name = args["name"],
+            type = args["type"],
+            level = args.get("level", 1),
+            max_hp = args["max_hp"],
+            max_mana = args["max_mana"],
+            weakness = list(args.get("weakness", [])),
+            weapons = [Attack.fromData(data) for data in args.get("weapons", [])],
+            spells = [Attack.fromData(data) for data in args.get("spells", [])],
+        )
+
+@dataclass
+class Turn:
+    player_attack : Attack
+    player_damage : int
+    enemy_is_weak : bool
+    enemy_attack : Attack
+    enemy_damage : int
+    player_is_weak : bool
+
+@dataclass
+class BattleResult:
+    victory : bool
+    turns : int
+    player_hp : int
+    enemy_hp : int
+
+NULL_ATTACK = Attack("NULL", "null", 0)
+
+# le funzioni accettano qualsiasi oggetto con gli stessi attributi,
+# quindi anche le armi e i personaggi del gioco
+
+def rollAttack(attack) -> tuple[int, bool]:
+    if randint(1, 100) <= attack.crit:
+        return (attack.damage * 2, True)
+    return (attack.damage, False)
+
+def getLevelFactor(
+    attacker_level : int,
+    defender_level : int,
+) -> float:
+    level_factor = 1 + (0.25 * ((attacker_level - defender_level) // 5))
+    return max(0.25, min(2, level_factor))
+
+def hasWeaponBuff(
+    player_type : str,
+    attack,
+) -> bool:
+    return (
+        (attack.is_spell and player_type == "mage")
+        or (attack.type == "bow" and player_type == "archer")
+        or (attack.type != "bow" and player_type == "knight")
+    )
+
+def cure(combatant) -> None:
+    new_hp = round(combatant.hp + (combatant.max_hp * CURE_RATIO))
+    combatant.hp = min(new_hp, combatant.max_hp)
+
+def applyDamage(
+    combatant,
+    damage : int,
+) -> None:
+    if combatant.hp > damage:
+        combatant.hp -= damage
+    else:
+        combatant.hp = 0
+        combatant.is_dead = True
+
+def getAttackDamage(
+    player,
+    attack,
+    enemy,
+) -> tuple[int, bool]:
+    weapon_buff = hasWeaponBuff(player.type, attack)
+    enemy_is_weak = False
+    level_factor = getLevelFactor(player.level, enemy.level)
+    if attack.is_spell:
+        enemy_is_weak = attack.effect in enemy.weakness
+        player.mana -= attack.mana
+    if attack.type == "cure":
+        cure(player)
+        damage = 0
+    else:
+        damage, attack.critical = rollAttack(attack)
+        damage = round(
+            damage
+            * level_factor
+            * (WEAK_MULT if enemy_is_weak else 1)
+            * (BUFF_MULT if weapon_buff else 1)
+        )
+    return (damage, enemy_is_weak)
+
+def chooseEnemyAttack(
+    enemy,
+    player,
+    default = NULL_ATTACK,
+):
+    best_attack = default
+    best_damage = 0
+    player_is_weak = False
+    level_factor = getLevelFactor(enemy.level, player.level)
+    for weapon in enemy.weapons:
+        if weapon.damage >= player.hp:
+            best_attack = weapon
+            break
+        potential_damage = (
+            weapon.damage
+            * (1 + (weapon.crit / 100))
+            * level_factor
+        )
+        if potential_damage > best_damage:
+            best_attack = weapon
+            best_damage = potential_damage
+
+    for spell in enemy.spells:
+        if enemy.mana >= spell.mana:
+            is_weak = spell.effect in player.weakness
+            spell_damage = (
+                spell.damage
+                * (WEAK_MULT if is_weak else 1)
+                * level_factor
+            )
+            if (spell_damage >= player.hp
+                or ((spell.type == "cure")
+                    and enemy.hp <= (enemy.max_hp * CURE_RATIO))):
+                best_attack = spell
+                player_is_weak = is_weak
+                break
+            if spell_damage > best_damage:
+                best_attack = spell
+                best_damage = spell_damage
+                player_is_weak = is_weak
+    return (best_attack, player_is_weak)
+
+def getEnemyAttack(
+    enemy,
+    player,
+    default = NULL_ATTACK,
+) -> tuple[Attack, int, bool]:
+    attack, player_is_weak = chooseEnemyAttack(enemy, player, default)
+    if attack.type == "cure":
+        cure(enemy)
+        damage = 0
+    else:
+        damage, attack.critical = rollAttack(attack)
+        damage = round(
+            damage
+            * getLevelFactor(enemy.level, player.level)
+            * (WEAK_MULT if player_is_weak else 1)
+        )
+    if attack.is_spell:
+        enemy.mana -= attack.mana
+    return (attack, damage, player_is_weak)
+
+def choosePlayerAttack(
+    player,
+    enemy,
+):
+    # l'attacco con il danno atteso piu' alto tra quelli pagabili
+    best_attack = None
+    best_damage = -1
+    for attack in player.weapons + player.spells:
+        if attack.is_spell and player.mana < attack.mana:
+            continue
+        expected = (
+            attack.damage
+            * (1 + (attack.crit / 100))
+            * (WEAK_MULT if attack.is_spell and attack.effect in enemy.weakness else 1)
+            * (BUFF_MULT if hasWeaponBuff(player.type, attack) else 1)
+        )
+        if attack.type == "cure":
+            expected = 0
+        if expected > best_damage:
+            best_attack = attack
+            best_damage = expected
+    return best_attack
+
+def resolveTurn(
+    player,
+    enemy,
+    attack,
+    default = NULL_ATTACK,
+) -> Turn:
+    # entrambi scelgono prima dei danni, come in battaglia
+    player_damage, enemy_is_weak = getAttackDamage(player, attack, enemy)
+    enemy_attack, enemy_damage, player_is_weak = getEnemyAttack(
+        enemy, player, default
+    )
+    applyDamage(enemy, player_damage)
+    if not enemy.is_dead:
+        applyDamage(player, enemy_damage)
+    return Turn(
+        attack, player_damage, enemy_is_weak,
+        enemy_attack, enemy_damage, player_is_weak,
+    )
+
+def simulateBattle(
+    player,
+    enemy,
+    choose_attack = choosePlayerAttack,
+    max_turns : int = 100,
+) -> BattleResult:
+    turns = 0
+    while (not player.is_dead) and (not enemy.is_dead) and turns < max_turns:
+        attack = choose_attack(player, enemy)
+        if attack is None:
+            break
+        resolveTurn(player, enemy, attack)
+        turns += 1
+    return BattleResult(enemy.is_dead, turns, player.hp, enemy.hp)
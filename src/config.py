@@ -1,4 +1,6 @@
+import os
 import sys
+from hashlib import sha1
 from json import loads, load, dumps
 
 from cryptography.fernet import Fernet
@@ -38,10 +40,31 @@ except FileNotFoundError:
 WIDTH = config_data["size"]["width"]
 HEIGHT = config_data["size"]["height"]
 SIZE = (WIDTH, HEIGHT)
+DIRTY_RECTS = config_data.get("dirty_rects", False)
 MAX_RATIO = (max(WIDTH, HEIGHT))/512
 X_RATIO = WIDTH/512
 Y_RATIO = HEIGHT/512
 
+def _getBakeHash() -> str:
+    # solo cio' che cambia i pixel cotti: risoluzione e immagini sorgente
+    digest = sha1(f"{WIDTH}x{HEIGHT}".encode("utf-8"))
+    if COMPILED:
+        # gli asset estratti cambiano solo insieme all'eseguibile
+        digest.update(str(os.stat(sys.executable).st_mtime_ns).encode("utf-8"))
+        return digest.hexdigest()
+    for root, _, files in sorted(os.walk(ASSETS_PATH)):
+        for file in sorted(files):
+            if file.endswith(".png"):
+                stat = os.stat(f"{root}/{file}")
+                digest.update(
+                    f"{root}/{file}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")
+                )
+    return digest.hexdigest()
+
+# asset gia' scalati per la risoluzione configurata
+BAKE_PATH = f"./cache/{WIDTH}x{HEIGHT}"
+BAKE_HASH = _getBakeHash()
+
 def saveState(
     save_data : dict,
 ) -> None:
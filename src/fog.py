@@ -0,0 +1,66 @@
+import pygame
+
+import assets as ats
+
+FOG_COLORKEY = (255, 255, 255)
+
+class Fog:
+    def __init__(
+        self,
+        fog_bg : pygame.Surface,
+        circle : pygame.Surface,
+        offset : tuple[int, int] = (64, 64),
+    ) -> None:
+        self._fog_mask = pygame.mask.from_surface(fog_bg)
+        self._circle_mask = pygame.mask.from_surface(circle)
+        self._offset = offset
+        # strato di nebbia senza luce, calcolato una volta sola
+        clear_mask = self._fog_mask.copy()
+        clear_mask.invert()
+        self._base = ats.convertSurface(clear_mask.to_surface(), alpha=False)
+        self._surface = self._base.copy()
+        self._surface.set_colorkey(FOG_COLORKEY)
+        self._bounds = self._surface.get_rect()
+        self._pos = None
+        self._light_rect = None
+
+    def _getLightRect(
+        self,
+        pos : tuple[int, int],
+    ) -> pygame.Rect:
+        return pygame.Rect(
+            (pos[0] - self._offset[0], pos[1] - self._offset[1]),
+            self._circle_mask.get_size(),
+        )
+
+    def update(
+        self,
+        pos : tuple[int, int],
+    ) -> None:
+        if pos == self._pos:
+            return
+        # si ripristina solo la zona illuminata in precedenza
+        if self._light_rect is not None:
+            self._surface.blit(self._base, self._light_rect, self._light_rect)
+        light_rect = self._getLightRect(pos)
+        rect = light_rect.clip(self._bounds)
+        if rect.width > 0 and rect.height > 0:
+            region = pygame.Mask(rect.size)
+            region.draw(self._fog_mask, (-rect.x, -rect.y))
+            region.erase(
+                self._circle_mask,
+                (light_rect.x - rect.x, light_rect.y - rect.y),
+            )
+            region.invert()
+            self._surface.blit(region.to_surface(), rect)
+        self._pos = pos
+        self._light_rect = rect
+
+    def show(
+        self,
+        screen : pygame.Surface,
+        pos : tuple[int, int],
+        dest : pygame.Rect,
+    ) -> None:
+        self.update(pos)
+        screen.blit(self._surface, dest)
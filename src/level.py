@@ -1,13 +1,22 @@
+from math import ceil
+
 import pygame
 
+import assets as ats
 import player as pl
 import characters as ch
+import combat as cb
+import fog as fg
+import lighting as lt
 import weapons as wp
 import objects as obj
+import render as rnd
+import spatial as sp
 import textboxes as tbx
+import timing as tm
 
 from config import (
-    X_RATIO, Y_RATIO, ASSETS_PATH, LOADED, 
+    X_RATIO, Y_RATIO, ASSETS_PATH, LOADED, DIRTY_RECTS,
     default_levels_data, loaded_levels_data
 )
 
@@ -22,6 +31,17 @@ MESSAGES = {
     "nemic_super" : "e' superefficace!",
 }
 
+HP_DRAIN_SPEED = 0.02
+
+# i menu aspettano l'input invece di girare a vuoto (ms)
+MENU_TIMEOUT = 100
+
+OPTION_PALETTE = {
+    "normal" : "white",
+    "hover" : "blue",
+    "disabled" : "grey",
+}
+
 pygame.mixer.init()
 SFX = {
     "attack" : pygame.mixer.Sound(f"{ASSETS_PATH}/SFX/attack.ogg"),
@@ -42,9 +62,21 @@ class PrimitiveLevel:
         self._name = name
         self._path = f"{ASSETS_PATH}/levels/{self._name}"
         self._scale_fact = (scale_fact*X_RATIO, scale_fact*Y_RATIO)
-        self._bg = pygame.image.load(f"{self._path}/bg.png")
-        self._bg = pygame.transform.scale_by(self._bg, self._scale_fact)
+        self._assets = ats.AssetGroup()
+        self._bg = self._assets.load(
+            f"{self._path}/bg.png", self._scale_fact, alpha=False
+        )
         self._bg_rect = self._bg.get_rect()
+        self._characters = []
+        self._objects = []
+        self._baked_objects = []
+        self._queued_objects = []
+        self._static_layer = rnd.StaticLayer(self._bg, self._bg_rect)
+        self._draw_list = rnd.DrawList(self._bg_rect)
+        cell_size = (sp.CELL_SIZE*X_RATIO, sp.CELL_SIZE*Y_RATIO)
+        self._character_index = sp.SpatialHash(cell_size)
+        self._object_index = sp.SpatialHash(cell_size)
+        self._dirty_rects = None
         self._player_start_pos = start_pos
         self._characters_ref = characters 
         self._objects_ref = objects
@@ -56,6 +88,7 @@ class PrimitiveLevel:
         self._setBoundMask()
 
     def _getCharacters(self) -> None:
+        self._releaseEntities(self._characters)
         self._characters = []
         for character in self._characters_ref:
             class_ = character["type"]["class"]
@@ -67,6 +100,7 @@ class PrimitiveLevel:
             })
 
     def _getObjects(self) -> None:
+        self._releaseEntities(self._objects)
         self._objects = []
         for object in self._objects_ref:
             kwargs = object["type"]["args"]
@@ -75,20 +109,73 @@ class PrimitiveLevel:
                 "pos" : object["pos"],
             })
 
+    def _releaseEntities(
+        self,
+        entities : list[dict],
+    ) -> None:
+        for entity in entities:
+            entity["type"].release()
+
+    def release(self) -> None:
+        self._assets.release()
+        self._walk_masks = {}
+        self._releaseEntities(self._characters)
+        self._releaseEntities(self._objects)
+        self._characters = []
+        self._objects = []
+
     def _setBoundMask(self) -> None:
-        mask_surface = pygame.image.load(f"{self._path}/mask.png")
-        mask_surface = pygame.transform.scale_by(mask_surface, self._scale_fact)
+        mask_surface = self._assets.load(
+            f"{self._path}/mask.png", self._scale_fact
+        )
         self._mask = pygame.mask.from_surface(mask_surface)
+        self._walk_masks : dict[int, tuple[pygame.Mask, pygame.Mask]] = {}
 
-    def _doesBoundMaskOverlap(
-        self, 
-        player : pl.Player, 
+    def _getWalkMask(
+        self,
+        player_mask : pygame.Mask,
+    ) -> pygame.Mask:
+        # un bit per ogni posizione in cui il giocatore tocca i bordi,
+        # spostato di (pw-1, ph-1) per coprire anche le coordinate negative
+        key = id(player_mask)
+        if key not in self._walk_masks:
+            self._walk_masks[key] = (
+                player_mask, self._mask.convolve(player_mask)
+            )
+        return self._walk_masks[key][1]
+
+    def _isBlocked(
+        self,
+        player_mask : pygame.Mask,
+        pos : tuple[float, float],
     ) -> bool:
-        overlap = self._mask.overlap(player.mask["last"], player.next_pos)
-        if overlap is None:
-            return False
-        else:
-            return True
+        walk_mask = self._getWalkMask(player_mask)
+        x = int(pos[0]) + player_mask.get_size()[0] - 1
+        y = int(pos[1]) + player_mask.get_size()[1] - 1
+        width, height = walk_mask.get_size()
+        if 0 <= x < width and 0 <= y < height:
+            return bool(walk_mask.get_at((x, y)))
+        # fuori dalla maschera non c'e' niente da toccare
+        return False
+
+    def _sweep(
+        self,
+        player_mask : pygame.Mask,
+        start : tuple[int, int],
+        movement : tuple[float, float],
+    ) -> float:
+        # frazione del movimento percorribile, a passi di al massimo un pixel
+        # per non attraversare i muri sottili
+        sub_steps = max(1, ceil(max(abs(movement[0]), abs(movement[1]))))
+        for i in range(1, sub_steps + 1):
+            # troncato come fa Rect.move
+            pos = (
+                start[0] + int(movement[0]*i/sub_steps),
+                start[1] + int(movement[1]*i/sub_steps),
+            )
+            if self._isBlocked(player_mask, pos):
+                return (i - 1)/sub_steps
+        return 1
 
     def _setLevel(
         self, 
@@ -97,6 +184,8 @@ class PrimitiveLevel:
     ) -> None:
         self._getCharacters()
         self._getObjects()
+        if self._dirty_rects is not None:
+            self._dirty_rects.invalidate()
         screen.blit(self._bg, self._bg_rect)
         player.setPos(
             screen,
@@ -104,6 +193,8 @@ class PrimitiveLevel:
              self._player_start_pos[1]*self._scale_fact[1]),
         )
         player.regenerate()
+        for rot in ("left", "right"):
+            self._getWalkMask(player.mask[rot])
         for character in self._characters:
             character["type"].setPos(
                 screen, 
@@ -117,24 +208,89 @@ class PrimitiveLevel:
                 (object["pos"][0]*self._scale_fact[0], 
                  object["pos"][1]*self._scale_fact[1]),
             )
+        self._indexEntities()
+        self._splitObjects()
+        self._static_layer.invalidate()
+
+    def _indexEntities(self) -> None:
+        self._character_index.clear()
+        for character in self._characters:
+            if character["type"].has_collision:
+                self._character_index.insert(
+                    character, character["type"].collision_rect
+                )
+        self._object_index.clear()
+        for object in self._objects:
+            if object["type"].has_collision:
+                self._object_index.insert(object, object["type"].rect)
+
+    def _splitObjects(self) -> None:
+        # gli oggetti vanno disegnati sopra i personaggi: quelli che ne
+        # toccano uno restano in coda dopo di loro, gli altri si cuociono
+        footprints = [
+            character["type"].getFootprint() for character in self._characters
+        ]
+        self._baked_objects = []
+        self._queued_objects = []
+        for object in self._objects:
+            if object["type"].rect.collidelist(footprints) >= 0:
+                self._queued_objects.append(object)
+            else:
+                self._baked_objects.append(object)
 
     def _blitLevel(
         self, 
         screen : pygame.Surface, 
         frame : int,
     ) -> None:
-        screen.blit(self._bg, self._bg_rect)
+        baked = self._static_layer.bake(
+            [object["type"] for object in self._baked_objects]
+        )
+        if self._dirty_rects is not None:
+            if baked:
+                self._dirty_rects.invalidate()
+            self._dirty_rects.restore(screen)
+        else:
+            screen.blit(self._static_layer.surface, self._static_layer.rect)
 
+        # personaggi e oggetti vanno in coda, nell'ordine di disegno,
+        # prima del giocatore
         for character in self._characters:
-           character["type"].idle(screen, frame, character["rot"])
-        for object in self._objects:
-            object["type"].show(screen)
+           character["type"].idle(self._draw_list, frame, character["rot"])
+        for object in self._queued_objects:
+            object["type"].show(self._draw_list)
+
+    def _getDrawRects(
+        self,
+        player : pl.Player,
+    ) -> list[pygame.Rect]:
+        rects = [player.draw_rect]
+        for character in self._characters:
+            rects.append(character["type"].draw_rect)
+        for object in self._queued_objects:
+            rects.append(object["type"].draw_rect)
+        return rects
 
     def _canMove(self, player : pl.Player) -> bool:
-        if (not self._in_inventory) and (not self._doesBoundMaskOverlap(player)):
-            return True
-        else:
+        if self._in_inventory:
             return False
+        player_mask = player.mask["last"]
+        movement = player.getMovement()
+        reach = self._sweep(player_mask, player.rect.topleft, movement)
+        if reach == 1:
+            return True
+        # contro un muro si scivola lungo l'asse ancora libero
+        for slide in ((movement[0], 0), (0, movement[1])):
+            if slide == (0, 0):
+                continue
+            if self._sweep(player_mask, player.rect.topleft, slide) == 1:
+                player.setMovement(slide)
+                return True
+        # altrimenti ci si avvicina al muro fin dove si puo'
+        if reach > 0:
+            player.setMovement((movement[0]*reach, movement[1]*reach))
+            return True
+        return False
         
     def _checkEvents(self) -> None:
         events = pygame.event.get()
@@ -163,82 +319,162 @@ class Level(PrimitiveLevel):
         scale_fact : int | float = 1,
         characters : list = [],
         objects : list = [],
+        dirty_rects : bool = DIRTY_RECTS,
+        lights : list | None = None,
+        player_light : dict = {"radius" : 64, "falloff" : 1},
+        darkness : int = 255,
     ) -> None:
         PrimitiveLevel.__init__(
             self, name, start_pos, music, scale_fact, characters, objects
         )
-        self._battle_bg = pygame.image.load(f"{self._path}/battle.png")
-        self._battle_bg = pygame.transform.scale_by(self._battle_bg, self._scale_fact)
+        self._battle_bg = self._assets.load(
+            f"{self._path}/battle.png", self._scale_fact, alpha=False
+        )
         self._battle_bg_rect = self._bg_rect
-        self._hp_bar = pygame.image.load(f"{ASSETS_PATH}/hp/hp.png")
-        self._hp_bar = pygame.transform.scale_by(self._hp_bar, self._scale_fact)
+        self._hp_bar = self._assets.load(
+            f"{ASSETS_PATH}/hp/hp.png", self._scale_fact
+        )
         self._has_fog = has_fog
         self._exit_point = ( 
             (exit_point[0]*X_RATIO, 
              exit_point[1]*Y_RATIO) 
             if exit_point is not None else None                    
         )
-        if self._has_fog:
+        self._lighting = None
+        if lights is not None and lt.AVAILABLE:
+            self._setLighting(lights, player_light, darkness)
+        elif self._has_fog:
             self._setFog()
+        # nebbia e luci coprono tutto lo schermo: si ridisegna per intero
+        if dirty_rects and not self._has_fog and self._lighting is None:
+            self._dirty_rects = rnd.DirtyRects(
+                self._static_layer.surface, self._bg_rect
+            )
+
+    def _getHostile(
+        self,
+        player : pl.Player,
+    ) -> dict | None:
+        for character in self._character_index.query(player.rect):
+            if (character["type"].has_collision
+                and character["type"].is_hostile
+                and player.rect.colliderect(character["type"].collision_rect)
+            ):
+                return character
+        return None
+
+    def _collectItems(
+        self,
+        player : pl.Player,
+    ) -> None:
+        for object in self._object_index.query(player.rect):
+            if (object["type"].has_collision
+                and object["type"].has_item
+                and player.rect.colliderect(object["type"].rect)
+            ):
+                player.addItem(object["type"].item)
+                object["type"].open()
+                # il forziere aperto cambia lo strato statico
+                self._static_layer.invalidate()
 
     def _checkExit(
         self,
         player : pl.Player,
     ) -> bool:
+        # tutta l'area attraversata nell'ultimo passo, non solo l'arrivo
         if ((self._exit_point is not None)
-            and player.rect.collidepoint(self._exit_point)):
+            and player.getSweptRect().collidepoint(self._exit_point)):
             return True
         else:
             return False
 
     def _setFog(self) -> None:
-        self._fog_bg = pygame.image.load(f"{ASSETS_PATH}/fog/fog.png")
-        self._fog_bg = pygame.transform.scale_by(self._fog_bg, self._scale_fact)
-        fog_circle = pygame.image.load(f"{ASSETS_PATH}/fog/circle.png")
-        fog_circle = pygame.transform.scale_by(fog_circle, self._scale_fact)
-        self.fog_circle_mask = pygame.mask.from_surface(fog_circle)
+        self._fog_bg = self._assets.load(
+            f"{ASSETS_PATH}/fog/fog.png", self._scale_fact
+        )
+        fog_circle = self._assets.load(
+            f"{ASSETS_PATH}/fog/circle.png", self._scale_fact
+        )
+        self._fog = fg.Fog(self._fog_bg, fog_circle)
 
     def _setFogPos(
         self, 
         screen : pygame.Surface, 
         pos : tuple[int, int],
     ) -> None:
-        self._fog_mask = pygame.mask.from_surface(self._fog_bg)
-        self._fog_mask.erase(self.fog_circle_mask, (pos[0] - 64, pos[1] - 64))
-        self._fog_mask.invert()
-        self._fog_mask_surf = self._fog_mask.to_surface()
-        self._fog_mask_surf.set_colorkey((255,255,255))
-        screen.blit(self._fog_mask_surf, self._bg_rect)
+        self._fog.show(screen, pos, self._bg_rect)
+
+    def _getLight(
+        self,
+        light : dict,
+    ) -> lt.Light:
+        return lt.Light(
+            (light.get("pos", (0, 0))[0]*self._scale_fact[0],
+             light.get("pos", (0, 0))[1]*self._scale_fact[1]),
+            light["radius"]*self._scale_fact[0],
+            light.get("falloff", 1),
+        )
+
+    def _setLighting(
+        self,
+        lights : list[dict],
+        player_light : dict,
+        darkness : int,
+    ) -> None:
+        self._lighting = lt.Lighting(
+            self._bg_rect.size,
+            [self._getLight(light) for light in lights],
+            darkness,
+        )
+        self._player_light = self._getLight(player_light)
+
+    def _setLightPos(
+        self,
+        screen : pygame.Surface,
+        pos : tuple[int, int],
+    ) -> None:
+        self._player_light.pos = pos
+        self._lighting.show(screen, [self._player_light], self._bg_rect)
 
     def _showHpBar(
         self,
         screen : pygame.Surface,
         entity : pl.Player | ch.Enemy,
+        steps : int = 1,
     ) -> None:
         if entity.hp >= 0:
             hp_ratio = entity.hp / entity.max_hp
         else:
             hp_ratio = 0
-        hp_bar = pygame.transform.scale_by(
-            self._hp_bar, 
-            (hp_ratio, 1)
-        )
-        hp_bar_rect = hp_bar.get_rect()
         if isinstance(entity, pl.Player):
             pos = (47, 82)
         else:
             pos = (304, 82)
+        # la barra scende gradualmente fino al nuovo valore
+        shown_ratio = self._hp_shown.get(pos, hp_ratio)
+        if shown_ratio > hp_ratio:
+            shown_ratio = max(hp_ratio, shown_ratio - HP_DRAIN_SPEED*steps)
+        else:
+            shown_ratio = hp_ratio
+        self._hp_shown[pos] = shown_ratio
+        hp_bar_rect = self._hp_bar.get_rect()
+        hp_bar_rect.width = int(hp_bar_rect.width*shown_ratio)
         hp_bar_rect.midleft = (pos[0]*X_RATIO, pos[1]*Y_RATIO)
-        screen.blit(hp_bar, hp_bar_rect)
+        screen.blit(self._hp_bar, hp_bar_rect, (0, 0, *hp_bar_rect.size))
 
     def _setBattle(
         self,
         screen : pygame.Surface,
         player : pl.Player,
         enemy : ch.Enemy,
+        warm_attacks : bool = True,
     ) -> None:
         screen.blit(self._battle_bg, self._battle_bg_rect)
 
+        if warm_attacks:
+            for attack in self._getBattleAttacks(player, enemy):
+                attack.loadAttack()
+
         player.setPos(
             screen,
             (128*self._scale_fact[0], 224*self._scale_fact[1]),
@@ -250,75 +486,38 @@ class Level(PrimitiveLevel):
             "left",
         )
 
+        self._hp_shown : dict[tuple[int, int], float] = {}
+
         self._sections : list[dict[str, tbx.Text | list[wp.PlayerWeapon | wp.PlayerSpell] | function]] = [
             {
-                "text" : tbx.Text("ARMI", align="center"),
+                "text" : tbx.Text(
+                    "ARMI", align="center", palette={"selected" : "blue"}
+                ),
                 "attacks" : player.weapons,
                 "func" : self._blitWeapons,
             },
             {
-                "text" : tbx.Text("INCANTESIMI", align="center"),
+                "text" : tbx.Text(
+                    "INCANTESIMI", align="center", palette={"selected" : "blue"}
+                ),
                 "attacks" : player.spells,
                 "func" : self._blitSpells,
             },
         ]
 
+    def _getBattleAttacks(
+        self,
+        player : pl.Player,
+        enemy : ch.Enemy,
+    ) -> list[wp.Weapon]:
+        return player.weapons + player.spells + enemy.weapons + enemy.spells
+
     def _getEnemyAttack(
         self,
         player : pl.Player,
         enemy : ch.Enemy,
     ) -> tuple[wp.Weapon, int, bool]:
-        best_attack = wp.NULL_ATTACK
-        best_damage = 0
-        player_is_weak = False
-        level_factor = 1 + (0.25 * ((enemy.level - player.level) // 5))
-        level_factor = max(0.25, min(2, level_factor))
-        for weapon in enemy.weapons:
-            if weapon.damage >= player.hp:
-                best_attack = weapon
-                break
-            potential_damage = (
-                weapon.damage 
-                * (1 + (weapon.crit /100)) 
-                * level_factor
-            )
-            if potential_damage > best_damage:
-                best_attack = weapon
-                best_damage = potential_damage
-
-        for spell in enemy.spells:
-            if enemy.mana >= spell.mana:
-                is_weak = spell.effect in player.weakness
-                spell_damage = (
-                    spell.damage
-                    * (1.5 if is_weak else 1)
-                    * level_factor
-                )
-                if (spell_damage >= player.hp
-                    or ((spell.type == "cure")
-                        and enemy.hp <= (enemy.max_hp * 0.2))):
-                    best_attack = spell
-                    player_is_weak = is_weak
-                    break
-                if spell_damage > best_damage:
-                    best_attack = spell
-                    best_damage = spell_damage
-                    player_is_weak = is_weak
-        
-        if best_attack.type == "cure":
-                enemy.cure()
-                damage = 0
-        else:
-            damage = round(
-                best_attack.attack()
-                * level_factor
-                * (1.5 if player_is_weak else 1)
-            )
-
-        if isinstance(best_attack, wp.Spell):
-            enemy.mana -= best_attack.mana
-            
-        return (best_attack, damage, player_is_weak)
+        return cb.getEnemyAttack(enemy, player, wp.NULL_ATTACK)
 
     def _blitSection(
         self,
@@ -329,9 +528,9 @@ class Level(PrimitiveLevel):
     ) -> None:
         for i, section in enumerate(self._sections):
             if section is self._current_section:
-                section["text"].changeColor("blue")
+                section["text"].setState("selected")
             else:
-                section["text"].changeColor("white")
+                section["text"].setState("normal")
             section["text"].show(screen, (74, 390+(33*i)))
             if (section["text"].rect.collidepoint(mouse_pos)
                 and mouse_click):
@@ -349,6 +548,9 @@ class Level(PrimitiveLevel):
     ) -> None:
         self._setBattle(screen, player, enemy)
 
+        timer = tm.FixedStep(clock)
+        timer.reset()
+        steps = 1
         frame = 0
         victory = False
         self.gameover = False
@@ -358,6 +560,7 @@ class Level(PrimitiveLevel):
         self._current_section = self._sections[0]
 
         message = ""
+        last_frame_key = None
 
         while (not self.quit) and (not victory) and (not self.gameover):
 
@@ -369,10 +572,41 @@ class Level(PrimitiveLevel):
                 if event.type == pygame.QUIT:
                     self.quit = True
 
+            # a battaglia finita si ridisegna solo quando qualcosa cambia
+            battle_over = (
+                (player.is_dead or enemy.is_dead)
+                and (not player_attacking)
+                and (enemy.is_dead or not enemy_attacking)
+            )
+            frame_key = (
+                player.getAnimFrame(frame),
+                enemy.getAnimFrame(frame),
+                tuple(self._hp_shown.values()),
+                message,
+            )
+            if (battle_over
+                and (not mouse_buttons[0])
+                and frame_key == last_frame_key):
+                # si dorme fino al prossimo evento, come nel menu iniziale,
+                # ma non oltre il prossimo fotogramma di riposo
+                event = pygame.event.wait(
+                    self._getIdleTimeout(player, enemy, frame + steps)
+                )
+                if event.type == pygame.QUIT:
+                    self.quit = True
+                keys = pygame.key.get_pressed()
+                victory = self._checkBattleEnd(player, enemy, keys)
+                frame += steps
+                steps = timer.tick(max_fps)
+                continue
+            last_frame_key = frame_key
+
             screen.blit(self._battle_bg, self._battle_bg_rect)
-            self._blitStatus(screen, player, enemy, message)
+            self._blitStatus(self._draw_list, player, enemy, message, steps)
 
-            self._blitSection(screen, player, mouse_pos, mouse_buttons[0])
+            self._blitSection(
+                self._draw_list, player, mouse_pos, mouse_buttons[0]
+            )
 
             # ottenere l'attacco del giocatore
             if ((not player_attacking)
@@ -380,9 +614,9 @@ class Level(PrimitiveLevel):
                 and (not player.is_dead) 
                 and (not enemy.is_dead)):
                 for attack in self._current_section["attacks"]:
-                    if (attack.box.rect.collidepoint(mouse_pos)
+                    if (attack.hitTest(mouse_pos)
                         and mouse_buttons[0]):
-                        if (isinstance(attack, wp.Spell)
+                        if (attack.is_spell
                             and player.mana < attack.mana):
                             message = "Non hai abbastanza mana"
                         else:
@@ -402,7 +636,9 @@ class Level(PrimitiveLevel):
                             break
 
             if player_attacking:
-                player_attacking = player_attack.attackAnim(screen, "right")
+                player_attacking = player_attack.attackAnim(
+                    self._draw_list, "right", steps
+                )
                 if not enemy_inflicted:
                     enemy.getDamage(player_damage)
                     SFX["attack"].play()
@@ -421,7 +657,9 @@ class Level(PrimitiveLevel):
             if ((not enemy.is_dead) 
                 and enemy_attacking 
                 and (not pygame.mixer.get_busy())):
-                enemy_attacking = enemy_attack.attackAnim(screen, "left")
+                enemy_attacking = enemy_attack.attackAnim(
+                    self._draw_list, "left", steps
+                )
                 if not player_inflicted:
                     player.getDamage(enemy_damage)
                     SFX["attack"].play()
@@ -437,19 +675,47 @@ class Level(PrimitiveLevel):
                     )
                 ))
 
-            if keys[pygame.K_RETURN]:
-                if enemy.is_dead:
-                    player.levelUp()
-                    victory = True
-                elif player.is_dead:
-                    self.gameover = True
+            victory = self._checkBattleEnd(player, enemy, keys)
 
-            player.idle(screen, frame, "right")
-            enemy.idle(screen, frame, "left")
+            player.idle(self._draw_list, frame, "right")
+            enemy.idle(self._draw_list, frame, "left")
+            self._draw_list.flush(screen)
 
             pygame.display.flip()
-            frame += 1
-            clock.tick(max_fps)
+            frame += steps
+            steps = timer.tick(max_fps)
+
+        for attack in self._getBattleAttacks(player, enemy):
+            attack.releaseAttack()
+
+    def _getIdleTimeout(
+        self,
+        player : pl.Player,
+        enemy : ch.Enemy,
+        frame : int,
+    ) -> int:
+        anim_frames = (player.getAnimFrame(frame), enemy.getAnimFrame(frame))
+        step_ms = 1000 / tm.STEP_FPS
+        steps = 1
+        while (steps*step_ms < MENU_TIMEOUT
+               and anim_frames == (player.getAnimFrame(frame + steps),
+                                   enemy.getAnimFrame(frame + steps))):
+            steps += 1
+        return min(MENU_TIMEOUT, ceil(steps*step_ms))
+
+    def _checkBattleEnd(
+        self,
+        player : pl.Player,
+        enemy : ch.Enemy,
+        keys : list[int],
+    ) -> bool:
+        if keys[pygame.K_RETURN]:
+            if enemy.is_dead:
+                player.levelUp()
+                return True
+            elif player.is_dead:
+                self.gameover = True
+        return False
 
     def _blitWeapons(
         self,
@@ -473,23 +739,28 @@ class Level(PrimitiveLevel):
         player : pl.Player,
         enemy : ch.Enemy,
         message : str,
+        steps : int = 1,
     ) -> None:
         player_hp = tbx.Text(
             f"{player.hp}/{player.max_hp}",
             align = "center",
+            backend = "glyph",
         )
         player_mana = tbx.Text(
             f"Man: {player.mana}/{player.max_mana}",
-            align = "center"
+            align = "center",
+            backend = "glyph",
         )
         player_level = tbx.Text(
             f"lv. {player.level}",
-            align =  "center"
+            align = "center",
+            backend = "glyph",
         )
         
         enemy_hp = tbx.Text(
             f"{enemy.hp}/{enemy.max_hp}",
             align = "center",
+            backend = "glyph",
         )
 
         message_text = tbx.Text(
@@ -502,13 +773,13 @@ class Level(PrimitiveLevel):
         player.name_text.show(screen, (128, 41))
         player_hp.show(screen, (207, 82))
         player_level.show(screen, (47, 41))
-        self._showHpBar(screen, player)
+        self._showHpBar(screen, player, steps)
         player_mana.show(screen, (74, 456))
         
         enemy.name_text.show(screen, (384, 41))
         enemy_hp.show(screen, (465, 82))
         enemy.level_text.show(screen, (304, 41))
-        self._showHpBar(screen, enemy)
+        self._showHpBar(screen, enemy, steps)
 
     def playLevel(
         self, 
@@ -528,6 +799,10 @@ class Level(PrimitiveLevel):
 
         player.saveState()
 
+        timer = tm.FixedStep(clock)
+        timer.reset()
+        steps = 1
+
         while ((not self.quit) 
                and (not self.passed) 
         ):
@@ -537,59 +812,80 @@ class Level(PrimitiveLevel):
             
             keys = pygame.key.get_pressed()
             self._checkEvents()
+            overlay = False
+
+            # urti e raccolte si risolvono a ogni passo, come l'uscita,
+            # cosi' non dipendono dai fotogrammi al secondo
+            enemy = None
+            for _ in range(steps):
+                player.getNextPos(keys)
+                self._can_move = self._canMove(player)
+                player.step(self._can_move)
+                if self._checkExit(player):
+                    self.passed = True
+                frame += 1
+                enemy = self._getHostile(player)
+                if enemy is not None:
+                    break
+                self._collectItems(player)
 
             self._blitLevel(screen, frame)
-            
-            player.getNextPos(keys)
-            
-            self._can_move = self._canMove(player)
-
-            if self._can_move:
-                player.move(screen, frame)
-            else:
-                player.idle(screen, frame)
-
-            for character in self._characters:
+            player.show(self._draw_list, frame, timer.alpha)
+            self._draw_list.flush(screen)
+
+            if enemy is not None:
+                player_last_pos = player.rect.center
+                enemy_pos = enemy["type"].rect.center
+                self._playBattle(
+                    screen, player, enemy["type"], clock, max_fps
+                )
+                player.setPos(screen, player_last_pos)
+                enemy["type"].setPos(screen, enemy_pos, enemy["rot"])
+                if enemy["type"].is_hostile or enemy["type"].has_dialogue:
+                    self._character_index.update(
+                        enemy, enemy["type"].collision_rect
+                    )
+                else:
+                    self._character_index.remove(enemy)
+                # il tempo passato in battaglia non si simula
+                timer.reset()
+                overlay = True
+
+            # solo le entita' nelle celle vicine al giocatore
+            for character in self._character_index.query(player.rect):
                 if (character["type"].has_collision
+                    and (not character["type"].is_hostile)
+                    and character["type"].has_dialogue
                     and player.rect.colliderect(character["type"].collision_rect)
                 ):
-                    if character["type"].is_hostile:
-                        player_last_pos = player.rect.center
-                        enemy_pos = character["type"].rect.center
-                        self._playBattle(
-                            screen, player, character["type"], clock, max_fps
-                        )
-                        player.setPos(screen, player_last_pos)
-                        character["type"].setPos(
-                            screen, enemy_pos, character["rot"]
-                        )
-                    elif character["type"].has_dialogue:
-                        character["type"].blitDialogue(screen, character["pos"])
-                        if self._next_page != last_page:
-                            character["type"].page += 1
-                            last_page = self._next_page
+                    character["type"].blitDialogue(screen, character["pos"])
+                    overlay = True
+                    if self._next_page != last_page:
+                        character["type"].page += 1
+                        last_page = self._next_page
 
-            for object in self._objects:
+            for object in self._object_index.query(player.rect):
                 if (object["type"].has_collision 
                     and player.rect.colliderect(object["type"].rect)
                 ):
-                    if object["type"].has_item:
-                        player.addItem(object["type"].item)
                     object["type"].collision(screen)
                     SFX["chest"].play()
+                    overlay = True
             
-            if self._has_fog:
+            if self._lighting is not None:
+                self._setLightPos(screen, player.rect.center)
+            elif self._has_fog:
                 self._setFogPos(screen, player.rect.center)
 
             if self._in_inventory:
                 player.inventory.show(screen)
+                overlay = True
 
-            if self._checkExit(player):
-                self.passed = True
-
-            pygame.display.flip()
-            frame += 1
-            clock.tick(max_fps)
+            if self._dirty_rects is not None:
+                self._dirty_rects.present(self._getDrawRects(player), overlay)
+            else:
+                pygame.display.flip()
+            steps = timer.tick(max_fps)
     
 class ClassSelection(PrimitiveLevel):
     def __init__(
@@ -620,6 +916,10 @@ class ClassSelection(PrimitiveLevel):
         
         player.saveState()
 
+        timer = tm.FixedStep(clock)
+        timer.reset()
+        steps = 1
+
         while ((not self.quit) 
                and (not self.passed) 
         ):
@@ -628,16 +928,15 @@ class ClassSelection(PrimitiveLevel):
         
             self._checkEvents()
 
-            self._blitLevel(screen, frame)
-            
-            player.getNextPos(keys)
-            
-            self._can_move = self._canMove(player)
+            for _ in range(steps):
+                player.getNextPos(keys)
+                self._can_move = self._canMove(player)
+                player.step(self._can_move)
+                frame += 1
 
-            if self._can_move:
-                player.move(screen, frame)
-            else:
-                player.idle(screen, frame,)
+            self._blitLevel(screen, frame)
+            player.show(self._draw_list, frame, timer.alpha)
+            self._draw_list.flush(screen)
 
             self.passed = self._chooseClass(player, keys)
 
@@ -645,8 +944,7 @@ class ClassSelection(PrimitiveLevel):
                 player.inventory.show(screen)
 
             pygame.display.flip()
-            frame += 1
-            clock.tick(max_fps)
+            steps = timer.tick(max_fps)
 
     def _chooseClass(
         self,  
@@ -668,12 +966,18 @@ class StartMenu:
     ) -> None:
         self._path = f"{ASSETS_PATH}/start_menu"
         self._scale_fact = (scale_fact*X_RATIO, scale_fact*Y_RATIO)
-        self._bg = pygame.image.load(f"{self._path}/bg.png")
-        self._bg = pygame.transform.scale_by(self._bg, self._scale_fact)
+        self._assets = ats.AssetGroup()
+        self._bg = self._assets.load(
+            f"{self._path}/bg.png", self._scale_fact, alpha=False
+        )
         self._bg_rect = self._bg.get_rect()
         self._options = [
             {
-                "text" : tbx.Text("Nuovo gioco", font_size=14),
+                "text" : tbx.Text(
+                    "Nuovo gioco", 
+                    font_size=14,
+                    palette=OPTION_PALETTE,
+                ),
                 "levels" : default_levels_data,
                 "has_collision" : True,
             },
@@ -681,47 +985,60 @@ class StartMenu:
                 "text" : tbx.Text(
                     "Carica Salvataggio", 
                     font_size=14,
-                    font_color=("grey" if not LOADED else "white")
+                    palette=OPTION_PALETTE,
                 ),
                 "levels" : loaded_levels_data,
                 "has_collision" : (True if LOADED else False),
             }
         ]
+        for option in self._options:
+            if not option["has_collision"]:
+                option["text"].setState("disabled")
         self.quit = False
 
+    def _blitMenu(
+        self,
+        screen : pygame.Surface,
+    ) -> None:
+        screen.blit(self._bg, self._bg_rect)
+        for i, option in enumerate(self._options):
+            option["text"].show(screen, (256, 355+(i*54)))
+        pygame.display.flip()
+
     def getLevels(
         self,
         screen : pygame.Surface,
     ) -> None:
-        running = True
-        while running:
-            
+        self._blitMenu(screen)
+        while True:
+            # si dorme fino al prossimo evento, o al massimo MENU_TIMEOUT
+            event = pygame.event.wait(MENU_TIMEOUT)
+            if event.type == pygame.QUIT:
+                self.quit = True
+                return None
+            redraw = event.type == pygame.WINDOWEXPOSED
+
             mouse_pos = pygame.mouse.get_pos()
             mouse_buttons = pygame.mouse.get_pressed()
-            events = pygame.event.get()
-            for event in events:
-                if event.type == pygame.QUIT:
-                    self.quit = True
-                    return None
-
-            screen.blit(self._bg, self._bg_rect)
-
-            for i, option in enumerate(self._options):
-                option["text"].show(screen, (256, 355+(i*54)))
-                if option["has_collision"]:
-                    if option["text"].rect.collidepoint(mouse_pos):
-                        option["text"].changeColor("blue")
-                        if mouse_buttons[0]:
-                            self._levels = option["levels"]
-                            SFX["start"].play()
-                            running = False
-                            break
-                    else:
-                        option["text"].changeColor("white")
-            
-            pygame.display.flip()
-
-        return self._levels
+            for option in self._options:
+                if not option["has_collision"]:
+                    continue
+                if option["text"].rect.collidepoint(mouse_pos):
+                    state = "hover"
+                    if mouse_buttons[0]:
+                        SFX["start"].play()
+                        return option["levels"]
+                else:
+                    state = "normal"
+                if option["text"].state != state:
+                    option["text"].setState(state)
+                    redraw = True
+
+            if redraw:
+                self._blitMenu(screen)
+
+    def release(self) -> None:
+        self._assets.release()
 
 
 CLASSES = {
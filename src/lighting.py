@@ -0,0 +1,101 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# senza numpy i livelli tornano alla nebbia semplice
+AVAILABLE = np is not None
+
+class Light:
+    def __init__(
+        self,
+        pos : tuple[int, int],
+        radius : int,
+        falloff : int | float = 1,
+    ) -> None:
+        self.pos = (int(pos[0]), int(pos[1]))
+        self.radius = int(radius)
+        self.falloff = falloff
+
+    def getKey(self) -> tuple:
+        return (self.pos, self.radius, self.falloff)
+
+class Lighting:
+    def __init__(
+        self,
+        size : tuple[int, int],
+        lights : list[Light] = [],
+        darkness : int = 255,
+    ) -> None:
+        self._size = size
+        self._darkness = darkness
+        self._kernels : dict[tuple, "np.ndarray"] = {}
+        self._static_alpha = np.full(size, darkness, dtype=np.uint8)
+        for light in lights:
+            self._applyLight(self._static_alpha, light)
+        self._alpha = self._static_alpha.copy()
+        self._surface = pygame.Surface(size, pygame.SRCALPHA)
+        self._surface.fill((0, 0, 0, darkness))
+        self._last_key = None
+
+    def _getKernel(
+        self,
+        radius : int,
+        falloff : int | float,
+    ) -> "np.ndarray":
+        key = (radius, falloff)
+        if key not in self._kernels:
+            x, y = np.ogrid[-radius:radius+1, -radius:radius+1]
+            distance = np.sqrt(x*x + y*y) / max(radius, 1)
+            intensity = np.clip(1 - distance, 0, 1) ** falloff
+            intensity[distance > 1] = 0
+            self._kernels[key] = (
+                self._darkness * (1 - intensity)
+            ).astype(np.uint8)
+        return self._kernels[key]
+
+    def _applyLight(
+        self,
+        alpha : "np.ndarray",
+        light : Light,
+    ) -> None:
+        kernel = self._getKernel(light.radius, light.falloff)
+        left = light.pos[0] - light.radius
+        top = light.pos[1] - light.radius
+        x0, y0 = max(left, 0), max(top, 0)
+        x1 = min(left + kernel.shape[0], self._size[0])
+        y1 = min(top + kernel.shape[1], self._size[1])
+        if x0 >= x1 or y0 >= y1:
+            return
+        window = alpha[x0:x1, y0:y1]
+        np.minimum(
+            window,
+            kernel[x0-left:x1-left, y0-top:y1-top],
+            out=window,
+        )
+
+    def update(
+        self,
+        lights : list[Light],
+    ) -> None:
+        key = tuple(light.getKey() for light in lights)
+        # solo le luci dinamiche vengono ricalcolate, e solo se cambiano
+        if key != self._last_key:
+            np.copyto(self._alpha, self._static_alpha)
+            for light in lights:
+                self._applyLight(self._alpha, light)
+            surface_alpha = pygame.surfarray.pixels_alpha(self._surface)
+            surface_alpha[...] = self._alpha
+            del surface_alpha
+            self._last_key = key
+
+    def show(
+        self,
+        screen : pygame.Surface,
+        lights : list[Light],
+        dest : pygame.Rect,
+    ) -> None:
+        self.update(lights)
+        screen.blit(self._surface, dest)
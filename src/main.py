@@ -3,11 +3,15 @@
 import pygame
 
 from config import SIZE, saveState
+import assets as ats
 import player as pl
 import level as lv
+import prefetch as pf
 
 pygame.init()
 screen = pygame.display.set_mode(SIZE)
+# le superfici caricate prima del display vengono convertite ora
+ats.CACHE.convertAll()
 clock = pygame.time.Clock()
 max_fps = 60
 
@@ -16,6 +20,7 @@ frame_count = 0
 start_menu = lv.StartMenu()
 
 levels_data = start_menu.getLevels(screen)
+start_menu.release()
 
 if not start_menu.quit:
     player = pl.Player(**(levels_data["player"]))
@@ -35,19 +40,39 @@ while running:
         if event.type == pygame.QUIT:
             running = False
         
-    for level in levels_data["levels"]:
+    prefetcher = None
+    for i, level in enumerate(levels_data["levels"]):
         if level["passed"]:
             continue
+        if prefetcher is not None:
+            prefetcher.wait()
         current_level = lv.CLASSES[level["class"]](**level["args"])
+        # il livello successivo viene caricato mentre si gioca questo
+        next_level = pf.getNextLevel(levels_data["levels"], i)
+        next_prefetcher = (
+            pf.Prefetcher(next_level) if next_level is not None else None
+        )
+        if next_prefetcher is not None:
+            next_prefetcher.start()
         if not current_level.passed:
             current_level.playLevel(screen, player, clock, max_fps)
+        if prefetcher is not None:
+            prefetcher.release()
+        prefetcher = next_prefetcher
         if not current_level.quit:
             level["passed"] = True
             levels_data["player"] = player.getData()
             new_data = True
         else:
             running = False
+            # il prefetch puo' essere ancora in corso: va atteso e
+            # rilasciato prima di pygame.quit
+            if prefetcher is not None:
+                prefetcher.wait()
+                prefetcher.release()
+            current_level.release()
             break
+        current_level.release()
         del current_level
     
     pygame.display.flip()
@@ -2,6 +2,7 @@ import pygame
 
 from config import X_RATIO, Y_RATIO, ASSETS_PATH
 
+import assets as ats
 import weapons as wp
 import textboxes as tbx
 
@@ -16,15 +17,17 @@ class Chest:
         self._path = f"{ASSETS_PATH}/objects/{"large_chest" if is_large else "chest"}"
         self.has_collision = has_collision
         self._scale_fact = (scale_fact*X_RATIO, scale_fact*Y_RATIO)
-        self._static = pygame.image.load(f"{self._path}/static.png")
-        self._static = pygame.transform.scale_by(self._static, self._scale_fact)
+        self._assets = ats.AssetGroup()
+        self._static = self._assets.load(
+            f"{self._path}/static.png", self._scale_fact,
+        )
         self.rect = self._static.get_rect()
+        self.draw_rect = self.rect.copy()
         self._current = self._static
         self._getItems(item)
         self.has_item = True
-        self._opened = pygame.image.load(f"{self._path}/open.png")
-        self._opened = pygame.transform.scale_by(
-            self._opened, self._scale_fact,
+        self._opened = self._assets.load(
+            f"{self._path}/open.png", self._scale_fact,
         )
         self._box = tbx.Box((160,96))
         self._text = tbx.Text(
@@ -58,21 +61,31 @@ class Chest:
         pos : tuple[int, int],
     ) -> None:
         self.rect.center = pos
-        screen.blit(self._current, self.rect)
+        self.draw_rect = screen.blit(self._current, self.rect)
     
     def show(
         self, 
         screen : pygame.Surface,
     ) -> None:
-        screen.blit(self._current, self.rect)
+        self.draw_rect = screen.blit(self._current, self.rect)
+
+    def release(self) -> None:
+        self._assets.release()
+        self._box.release()
+        # l'oggetto raccolto appartiene ormai al giocatore
+        if self.has_item:
+            self.item.release()
 
     def _toOpen(self) -> None:
         self._current = self._opened
 
+    def open(self) -> None:
+        self.has_item = False
+        self._toOpen()
+
     def collision(
         self,
         screen : pygame.Surface,
         ) -> None:
-        self.has_item = False
-        self._toOpen()
+        self.open()
         self._showItem(screen, self.rect.center)
\ No newline at end of file
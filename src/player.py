@@ -5,7 +5,10 @@ from typing import Literal
 import pygame
 
 from config import X_RATIO, Y_RATIO, MAX_RATIO, ASSETS_PATH
+import assets as ats
 import characters as ch
+import combat as cb
+import render as rnd
 import textboxes as tbx
 import weapons as wp
 
@@ -43,8 +46,12 @@ class Player:
 			wp.CLASSES[spell["class"]](**spell["args"]) for spell in spells
 		]
 		self._frame_mult = frame_mult
+		self._assets = ats.AssetGroup()
 		self._setSprites()
 		self.rect = self._static["last"].get_rect()
+		self.draw_rect = self.rect.copy()
+		self._last_pos = self.rect.topleft
+		self._walking = False
 		self.is_dead = False
 		self.max_hp = self.hp = max_hp
 		self.max_mana = self.mana = max_mana
@@ -71,17 +78,12 @@ class Player:
 		self._right_mask = pygame.mask.from_surface(self._static_right)
 
 	def _setSprites(self) -> None:
-		self._static_right = pygame.image.load(
-			f"{self._path}/static/static_right.png"
+		self._assets.release()
+		self._static_right = self._assets.loadFrame(
+			self._path, "static/static_right", self._scale_fact
 		)
-		self._static_right = pygame.transform.scale_by(
-			self._static_right, self._scale_fact
-		)
-		self._static_left = pygame.image.load(
-			f"{self._path}/static/static_left.png"
-		)
-		self._static_left = pygame.transform.scale_by(
-			self._static_left, self._scale_fact
+		self._static_left = self._assets.loadFrame(
+			self._path, "static/static_left", self._scale_fact
 		)
 		self._setMask()
 		# WALK
@@ -94,41 +96,29 @@ class Player:
 			# WALK:
 			# right
 			self._right_walk.append(
-				pygame.image.load(
-					f"{self._path}/right_walk/{i}.png"
+				self._assets.loadFrame(
+					self._path, f"right_walk/{i}", self._scale_fact
 				)
 			)
-			self._right_walk[i] = pygame.transform.scale_by(
-				self._right_walk[i], self._scale_fact
-			)
 			# left
 			self._left_walk.append(
-				pygame.image.load(
-					f"{self._path}/left_walk/{i}.png"
+				self._assets.loadFrame(
+					self._path, f"left_walk/{i}", self._scale_fact
 				)
 			)
-			self._left_walk[i] = pygame.transform.scale_by(
-				self._left_walk[i], self._scale_fact
-			)
 			# IDLE:
 			# right
 			self._right_idle.append(
-				pygame.image.load(
-					f"{self._path}/right_idle/{i}.png"
+				self._assets.loadFrame(
+					self._path, f"right_idle/{i}", self._scale_fact
 				)
 			)
-			self._right_idle[i] = pygame.transform.scale_by(
-				self._right_idle[i], self._scale_fact
-			)
 			# left
 			self._left_idle.append(
-				pygame.image.load(
-					f"{self._path}/left_idle/{i}.png"
+				self._assets.loadFrame(
+					self._path, f"left_idle/{i}", self._scale_fact
 				)
 			)
-			self._left_idle[i] = pygame.transform.scale_by(
-				self._left_idle[i], self._scale_fact
-			)
 				
 		self._static = {
 			"left" : self._static_left,
@@ -161,6 +151,9 @@ class Player:
 		self._frame_mult = player_class.frame_mult
 		self.weapons = player_class.weapons
 		self.spells = player_class.spells
+		# le armi passano al giocatore: la classe non le rilascia piu'
+		player_class.weapons = []
+		player_class.spells = []
 		self.weakness = player_class.weakness
 		self.hp = self.max_hp = player_class.max_hp
 		self.mana = self.max_mana = player_class.max_mana
@@ -170,10 +163,12 @@ class Player:
 		tmp_rect_pos = self.rect.center
 		self.rect = player_class.rect
 		self.rect.center = tmp_rect_pos
+		self._last_pos = self.rect.topleft
 		self.name_text = tbx.Text(
 			    f"{self.name}",
 		    align = "center"
 		)
+		self.inventory.invalidate()
 
 	def addItem(
 		self,
@@ -183,6 +178,7 @@ class Player:
 			self.spells.append(item)
 		else:
 			self.weapons.append(item)
+		self.inventory.invalidate()
 
 	def setPos(
 		self, 
@@ -191,7 +187,8 @@ class Player:
 		rot : Literal["left", "right", "last"] = "last",
 	) -> None:
 		self.rect.center = pos
-		screen.blit(self._static[rot], self.rect)
+		self._last_pos = self.rect.topleft
+		self.draw_rect = screen.blit(self._static[rot], self.rect)
 
 	def _setRotation(
 		self, 
@@ -200,14 +197,20 @@ class Player:
 		for anim in [self._static, self._idle, self._walk, self.mask]:
 			anim["last"] = anim[rot]
 
+	def getAnimFrame(
+		self,
+		frame : int,
+	) -> int:
+		return (frame // self._frame_mult) % self._max_frames
+
 	def idle(
 		self, 
 		screen : pygame.Surface,
 		frame : int,
 		rot : Literal["left", "right", "last"] = "last",
 	) -> None:
-		anim_frame = (frame // self._frame_mult) % self._max_frames
-		screen.blit(self._idle[rot][anim_frame], self.rect)
+		anim_frame = self.getAnimFrame(frame)
+		self.draw_rect = screen.blit(self._idle[rot][anim_frame], self.rect)
 
 	def _normalize_movement(self) -> None:
 		norm = sqrt(sum((comp**2) for comp in self._movement))
@@ -220,6 +223,7 @@ class Player:
 		self, 
 		keys : list[int],
 	) -> None:
+		last_static = self._static["last"]
 		self._movement = [0,0]
 		if keys[pygame.K_a]:
 			self._setRotation("left")
@@ -232,72 +236,72 @@ class Player:
 		if keys[pygame.K_w]:
 			self._movement[1] += -1
 		self._normalize_movement()
-		self.next_pos = (
-			self.rect.topleft[0]+self._movement[0], 
-			self.rect.topleft[1]+self._movement[1]
-		)
+		# il ritratto nell'inventario segue la rotazione
+		if self._static["last"] is not last_static:
+			self.inventory.invalidate()
 
-	def move(
-		self, 
+	def step(
+		self,
+		can_move : bool = True,
+	) -> None:
+		# un passo di simulazione, senza disegnare
+		self._last_pos = self.rect.topleft
+		self._walking = can_move and self._movement != [0,0]
+		if self._walking:
+			self.rect = self.rect.move(self._movement)
+
+	def getSweptRect(self) -> pygame.Rect:
+		# area coperta durante l'ultimo passo
+		return self.rect.union(pygame.Rect(self._last_pos, self.rect.size))
+
+	def show(
+		self,
 		screen : pygame.Surface,
 		frame : int,
+		alpha : float = 1,
 	) -> None:
-		if self._movement == [0,0]:
-			self.idle(screen, frame)
-			return 
+		# disegnato tra l'ultimo passo e quello corrente
+		draw_rect = self.rect.copy()
+		draw_rect.topleft = (
+			round(self._last_pos[0] + (self.rect.x - self._last_pos[0])*alpha),
+			round(self._last_pos[1] + (self.rect.y - self._last_pos[1])*alpha),
+		)
+		if self._walking:
+			anim = self._walk["last"]
+		else:
+			anim = self._idle["last"]
+		self.draw_rect = screen.blit(anim[self.getAnimFrame(frame)], draw_rect)
 
-		anim_frame = (frame // self._frame_mult) % self._max_frames
+	def getMovement(self) -> tuple[float, float]:
+		return tuple(self._movement)
 
-		self.rect = self.rect.move(self._movement)
-		screen.blit(self._walk["last"][anim_frame], self.rect)
+	def setMovement(
+		self,
+		movement : tuple[float, float],
+	) -> None:
+		self._movement = list(movement)
 
 	def getAttackDamage(
 		self,
 		attack : wp.Weapon,
 		enemy : ch.Enemy,
 	) -> tuple[int, bool]:
-		if ((isinstance(attack, wp.Spell) and self.type == "mage") 
-	  		or (attack.type == "bow" and self.type == "archer") 
-			or (attack.type != "bow" and self.type == "knight")):
-			weaponbuff = True
-		else:
-			weaponbuff = False
-		enemy_is_weak = False
-		level_factor = 1 + (0.25 * ((self.level - enemy.level) // 5))
-		level_factor = max(0.25, min(2, level_factor))
-		if isinstance(attack, wp.Spell):
-			enemy_is_weak = attack.effect in enemy.weakness
-			self.mana -= attack.mana
-		if attack.type == "cure":
-			self._cure()
-			damage = 0
-		else:
-			damage = round(
-			    attack.attack() 
-			    * level_factor
-			    * (1.5 if enemy_is_weak else 1)
-				* (1.5 if weaponbuff else 1)
-			)
-		return (damage, enemy_is_weak)
+		damage = cb.getAttackDamage(self, attack, enemy)
+		self.inventory.invalidate()
+		return damage
 	
 	def getDamage(
 		self,
 		damage : int,
 	) -> None:
-		if self.hp > damage:
-			self.hp -= damage
-		else:
-			self.hp = 0
-			self.is_dead = True
-	
-	def _cure(self) -> None:
-		new_hp = round(self.hp + (self.max_hp * 0.2)) 
-		self.hp = min(new_hp, self.max_hp)
+		cb.applyDamage(self, damage)
+		self.inventory.invalidate()
 
 	def levelUp(self) -> None:
 		self.max_hp = max(7, round(self.max_hp + (15 * self._hp_mult)))
 		self.max_mana = max(1, round(self.max_mana + (2 * self._mana_mult)))
 		self.level += 1
+		self.inventory.invalidate()
 
 	def saveState(self) -> None:
 		self._last_hp = self.max_hp
@@ -313,10 +317,12 @@ class Player:
 		self.level = self._last_level
 		self.weapons = self._last_weapons
 		self.spells = self._last_spells
+		self.inventory.invalidate()
 
 	def regenerate(self) -> None:
 		self.hp = self.max_hp
 		self.mana = self.max_mana
+		self.inventory.invalidate()
 
 	def getData(self) -> dict:
 		weapons = [
@@ -349,47 +355,65 @@ class Player:
 
 class Inventory:
 	def __init__(self, player : Player) -> None:
-		self._box = pygame.image.load(f"{ASSETS_PATH}/inventory/static.png")
-		self._box = pygame.transform.scale_by(self._box, (X_RATIO, Y_RATIO))
+		self._box = ats.CACHE.load(
+			f"{ASSETS_PATH}/inventory/static.png", (X_RATIO, Y_RATIO)
+		)
 		self._rect = self._box.get_rect()
 		self._rect.center = (256*X_RATIO, 256*Y_RATIO)
 		self._player = player
 		self._weapons_text = tbx.Text("Armi", align = "center")
 		self._spells_text = tbx.Text("Incantesimi", align = "center")
-		self._update()
+		self._panel = None
+
+	def invalidate(self) -> None:
+		self._panel = None
 
 	def _update(self) -> None:
 		self._name = tbx.Text(
 			f"{self._player.name}", 
 			align = "center",
+			backend = "glyph",
 		)
 		self._level = tbx.Text(
 			f"lv. {self._player.level}",
 			align = "center",
+			backend = "glyph",
 		)
 		self._hp = tbx.Text(
 			f" PV: {self._player.hp}/{self._player.max_hp}", 
 			align = "center",
+			backend = "glyph",
 		)
 		self._mana = tbx.Text(
 			f"Mana: {self._player.mana}/{self._player.max_mana}", 
 			align = "center",
+			backend = "glyph",
 		)
 
 	def show(
 		self, 
 		screen : pygame.Surface,
 	) -> None:
+		# il pannello si ricompone solo quando il giocatore cambia
+		if self._panel is None:
+			self._panel = self._composePanel()
+		panel, panel_rect = self._panel
+		screen.blit(panel, panel_rect)
+
+	def _composePanel(self) -> tuple[pygame.Surface, pygame.Rect]:
 		self._update()
-		screen.blit(self._box, self._rect)
-		self._player.showStatic(screen, (73, 113))
+		draw_list = rnd.DrawList()
+		draw_list.blit(self._box, self._rect)
+		self._player.showStatic(draw_list, (73, 113))
 		for i, text in enumerate([self._name, self._level, self._hp, self._mana]):
-			text.show(screen, (74, 224+(i*55)))
-		self._weapons_text.show(screen, (218, 113))
-		self._spells_text.show(screen, (400, 113))
+			text.show(draw_list, (74, 224+(i*55)))
+		self._weapons_text.show(draw_list, (218, 113))
+		self._spells_text.show(draw_list, (400, 113))
 		if self._player.weapons is not None:
 			for i, weapon in enumerate(self._player.weapons):
-				weapon.showBox(screen, (218, 180+(69*i)))
+				weapon.showBox(draw_list, (218, 180+(69*i)))
 		if self._player.spells is not None:
 			for j, spell in enumerate(self._player.spells):
-				spell.showBox(screen, (400, 180+(69*j)))
+				spell.showBox(draw_list, (400, 180+(69*j)))
+		panel, panel_rect = draw_list.toSurface()
+		return (ats.convertSurface(panel), panel_rect)
@@ -0,0 +1,146 @@
+from threading import Thread
+
+import pygame
+
+from config import X_RATIO, Y_RATIO, ASSETS_PATH
+import assets as ats
+import atlas as atl
+import characters as ch
+import weapons as wp
+
+def _getScale(
+    scale_fact : int | float,
+) -> tuple[float, float]:
+    return (scale_fact*X_RATIO, scale_fact*Y_RATIO)
+
+def _getBoxScale(
+    size : tuple[int, int],
+) -> tuple[float, float]:
+    return ((size[0]/254)*X_RATIO, (size[1]/105)*Y_RATIO)
+
+def _getFrame(
+    directory : str,
+    name : str,
+    scale_fact : tuple[float, float],
+) -> tuple[str, tuple[float, float], bool]:
+    # come AssetGroup.loadFrame: l'atlante si usa solo a scale intere
+    if (atl.getFrameRect(directory, name) is None
+        or not ats.isIntegerScale(scale_fact)):
+        return (f"{directory}/{name}.png", scale_fact, True)
+    return (f"{directory}/{atl.ATLAS_NAME}.png", scale_fact, True)
+
+def _getAttackAssets(attack : dict) -> list[tuple]:
+    class_ = wp.CLASSES[attack["class"]]
+    args = attack["args"]
+    if issubclass(class_, wp.Spell):
+        directory = f"{ASSETS_PATH}/spells"
+        static_name = f"{args['type']}/static/static"
+        scale_fact = _getScale(1)
+    else:
+        directory = f"{ASSETS_PATH}/weapons/{args['type']}"
+        static_name = "static/static"
+        scale_fact = _getScale(args.get("scale_fact", 1))
+    # i fotogrammi dell'attacco si caricano solo in battaglia
+    assets = [_getFrame(directory, static_name, scale_fact)]
+    if issubclass(class_, (wp.PlayerWeapon, wp.PlayerSpell)):
+        assets.append(
+            (f"{ASSETS_PATH}/dialogue/static.png", _getBoxScale((128, 48)), True)
+        )
+    return assets
+
+def _getCharacterAssets(character : dict) -> list[tuple]:
+    class_ = ch.CLASSES[character["class"]]
+    args = character["args"]
+    directory = f"{ASSETS_PATH}/sprites/{args['type']}"
+    scale_fact = _getScale(args.get("scale_fact", 1))
+    assets = [
+        _getFrame(directory, "static/static_right", scale_fact),
+        _getFrame(directory, "static/static_left", scale_fact),
+    ]
+    for i in range(args["max_frames"]):
+        assets.append(_getFrame(directory, f"right_idle/{i}", scale_fact))
+        assets.append(_getFrame(directory, f"left_idle/{i}", scale_fact))
+    if issubclass(class_, (ch.Enemy, ch.Subplayer)):
+        for attack in args.get("weapons", []) + args.get("spells", []):
+            assets += _getAttackAssets(attack)
+    return assets
+
+def _getObjectAssets(object : dict) -> list[tuple]:
+    args = object["args"]
+    directory = (
+        f"{ASSETS_PATH}/objects/"
+        + ("large_chest" if args.get("is_large", False) else "chest")
+    )
+    scale_fact = _getScale(args.get("scale_fact", 1))
+    assets = [
+        (f"{directory}/static.png", scale_fact, True),
+        (f"{directory}/open.png", scale_fact, True),
+        (f"{ASSETS_PATH}/dialogue/static.png", _getBoxScale((160, 96)), True),
+    ]
+    return assets + _getAttackAssets(args["item"])
+
+def getLevelAssets(level : dict) -> list[tuple]:
+    args = level["args"]
+    path = f"{ASSETS_PATH}/levels/{args['name']}"
+    scale_fact = _getScale(args.get("scale_fact", 1))
+    assets = [
+        (f"{path}/bg.png", scale_fact, False),
+        (f"{path}/mask.png", scale_fact, True),
+    ]
+    if level["class"] == "Level":
+        assets += [
+            (f"{path}/battle.png", scale_fact, False),
+            (f"{ASSETS_PATH}/hp/hp.png", scale_fact, True),
+        ]
+        if args.get("has_fog", False):
+            assets += [
+                (f"{ASSETS_PATH}/fog/fog.png", scale_fact, True),
+                (f"{ASSETS_PATH}/fog/circle.png", scale_fact, True),
+            ]
+    for character in args.get("characters", []):
+        assets += _getCharacterAssets(character["type"])
+    for object in args.get("objects", []):
+        assets += _getObjectAssets(object["type"])
+    # ogni immagine una sola volta, nell'ordine in cui serve
+    return list(dict.fromkeys(assets))
+
+def getNextLevel(
+    levels : list[dict],
+    current : int,
+) -> dict | None:
+    for level in levels[current+1:]:
+        if not level["passed"]:
+            return level
+    return None
+
+class Prefetcher:
+    def __init__(
+        self,
+        level : dict,
+        cache : ats.SurfaceCache = ats.CACHE,
+    ) -> None:
+        self._assets = getLevelAssets(level)
+        self._cache = cache
+        self._loaded : list[tuple] = []
+        self._thread = Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        for path, scale_fact, alpha in self._assets:
+            try:
+                self._cache.prefetch(path, scale_fact, alpha)
+            except (FileNotFoundError, pygame.error):
+                # verra' caricato (e segnalato) dal thread principale
+                continue
+            self._loaded.append((path, scale_fact))
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def wait(self) -> None:
+        self._thread.join()
+
+    def release(self) -> None:
+        self.wait()
+        for path, scale_fact in self._loaded:
+            self._cache.release(path, scale_fact)
+        self._loaded = []
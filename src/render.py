@@ -0,0 +1,118 @@
+import pygame
+
+class DirtyRects:
+    def __init__(
+        self,
+        background : pygame.Surface,
+        background_rect : pygame.Rect,
+    ) -> None:
+        self._background = background
+        self._background_rect = background_rect
+        self._last_rects : list[pygame.Rect] = []
+        self.full = True
+
+    def invalidate(self) -> None:
+        self.full = True
+
+    def restore(
+        self,
+        screen : pygame.Surface,
+    ) -> None:
+        if self.full:
+            screen.blit(self._background, self._background_rect)
+            return
+        for rect in self._last_rects:
+            screen.blit(
+                self._background, rect,
+                rect.move(-self._background_rect.x, -self._background_rect.y),
+            )
+
+    def present(
+        self,
+        rects : list[pygame.Rect],
+        full : bool = False,
+    ) -> None:
+        # dopo un frame intero (o un overlay) serve un altro frame intero
+        if self.full or full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._last_rects + rects)
+        self._last_rects = [rect.copy() for rect in rects]
+        self.full = full
+
+class StaticLayer:
+    def __init__(
+        self,
+        background : pygame.Surface,
+        background_rect : pygame.Rect,
+    ) -> None:
+        self._background = background
+        self.rect = background_rect
+        self.surface = background.copy()
+        self._valid = False
+
+    def invalidate(self) -> None:
+        self._valid = False
+
+    def bake(
+        self,
+        statics : list,
+    ) -> bool:
+        # sfondo ed elementi fermi in un'unica superficie
+        if self._valid:
+            return False
+        self.surface.blit(self._background, (0, 0))
+        for static in statics:
+            static.show(self.surface)
+        self._valid = True
+        return True
+
+class DrawList:
+    def __init__(
+        self,
+        bounds : pygame.Rect | None = None,
+    ) -> None:
+        self._bounds = bounds
+        self._items : list[tuple] = []
+
+    def blit(
+        self,
+        source : pygame.Surface,
+        dest : pygame.Rect | tuple[int, int],
+        area : pygame.Rect | tuple | None = None,
+        z : int = 0,
+    ) -> pygame.Rect:
+        # stessa interfaccia di Surface.blit, ma il disegno e' rimandato
+        if area is None:
+            rect = pygame.Rect(dest[:2], source.get_size())
+        else:
+            rect = pygame.Rect(dest[:2], pygame.Rect(area).size)
+        self._items.append((z, len(self._items), source, rect, area))
+        if self._bounds is None:
+            return rect.copy()
+        return rect.clip(self._bounds)
+
+    def flush(
+        self,
+        screen : pygame.Surface,
+    ) -> None:
+        items = sorted(self._items, key=lambda item: item[:2])
+        if all(item[4] is None for item in items):
+            screen.fblits([(item[2], item[3]) for item in items])
+        else:
+            screen.blits(
+                [(item[2], item[3], item[4]) for item in items],
+                doreturn=False,
+            )
+        self._items = []
+
+    def toSurface(self) -> tuple[pygame.Surface, pygame.Rect]:
+        # compone la coda in una superficie sola invece di disegnarla
+        rect = self._items[0][3].unionall([item[3] for item in self._items])
+        self._items = [
+            (*item[:3], item[3].move(-rect.x, -rect.y), item[4])
+            for item in self._items
+        ]
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        self.flush(surface)
+        return (surface, rect)
@@ -0,0 +1,296 @@
+import sys
+from argparse import ArgumentParser
+from json import load
+from time import perf_counter
+
+import numpy as np
+
+import combat as cb
+
+# oltre questo numero di turni la battaglia conta come persa
+MAX_TURNS = 100
+
+def _getAttackTable(
+    attacks : list[cb.Attack],
+) -> dict[str, np.ndarray]:
+    return {
+        "damage" : np.array([attack.damage for attack in attacks], dtype=np.float64),
+        "crit" : np.array([attack.crit for attack in attacks], dtype=np.int64),
+        "mana" : np.array([attack.mana for attack in attacks], dtype=np.int64),
+        "is_spell" : np.array([attack.is_spell for attack in attacks], dtype=bool),
+        "is_cure" : np.array([attack.type == "cure" for attack in attacks], dtype=bool),
+    }
+
+def _roll(
+    rng : np.random.Generator,
+    damage : np.ndarray,
+    crit : np.ndarray,
+) -> np.ndarray:
+    # come Weapon.attack: critico se randint(1, 100) <= crit
+    critical = rng.integers(1, 101, size=damage.shape) <= crit
+    return np.where(critical, damage*2, damage)
+
+def _cure(
+    hp : np.ndarray,
+    max_hp : int | np.ndarray,
+    mask : np.ndarray,
+) -> None:
+    cured = np.minimum(np.round(hp + max_hp*cb.CURE_RATIO), max_hp)
+    hp[mask] = cured[mask]
+
+def _choosePlayerAttacks(
+    player : cb.Combatant,
+    enemy : cb.Combatant,
+    attacks : list[cb.Attack],
+    mana : np.ndarray,
+) -> np.ndarray:
+    # stessa scelta di combat.choosePlayerAttack, per ogni battaglia
+    order = sorted(
+        range(len(attacks)),
+        key=lambda i: -_getExpectedDamage(player, enemy, attacks[i]),
+    )
+    choice = np.full(mana.shape, -1, dtype=np.int64)
+    for i in reversed(order):
+        attack = attacks[i]
+        affordable = (not attack.is_spell) | (mana >= attack.mana)
+        choice[affordable] = i
+    return choice
+
+def _getExpectedDamage(
+    player : cb.Combatant,
+    enemy : cb.Combatant,
+    attack : cb.Attack,
+) -> float:
+    if attack.type == "cure":
+        return 0
+    return (
+        attack.damage
+        * (1 + (attack.crit / 100))
+        * (cb.WEAK_MULT if attack.is_spell and attack.effect in enemy.weakness else 1)
+        * (cb.BUFF_MULT if cb.hasWeaponBuff(player.type, attack) else 1)
+    )
+
+def _chooseEnemyAttacks(
+    player : cb.Combatant,
+    enemy : cb.Combatant,
+    player_hp : np.ndarray,
+    enemy_hp : np.ndarray,
+    enemy_mana : np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    # stessa logica di combat.chooseEnemyAttack, con le maschere al posto
+    # dei break; -1 e' l'attacco nullo
+    level_factor = cb.getLevelFactor(enemy.level, player.level)
+    size = player_hp.shape
+    choice = np.full(size, -1, dtype=np.int64)
+    is_weak = np.zeros(size, dtype=bool)
+    best_damage = np.zeros(size)
+    stopped = np.zeros(size, dtype=bool)
+    for i, weapon in enumerate(enemy.weapons):
+        kill = (~stopped) & (weapon.damage >= player_hp)
+        choice[kill] = i
+        potential_damage = (
+            weapon.damage * (1 + (weapon.crit / 100)) * level_factor
+        )
+        better = (~stopped) & (~kill) & (potential_damage > best_damage)
+        choice[better] = i
+        best_damage[better] = potential_damage
+        stopped |= kill
+    stopped = np.zeros(size, dtype=bool)
+    offset = len(enemy.weapons)
+    for i, spell in enumerate(enemy.spells):
+        active = (~stopped) & (enemy_mana >= spell.mana)
+        spell_is_weak = spell.effect in player.weakness
+        spell_damage = (
+            spell.damage * (cb.WEAK_MULT if spell_is_weak else 1) * level_factor
+        )
+        take = active & (
+            (spell_damage >= player_hp)
+            | ((spell.type == "cure") & (enemy_hp <= enemy.max_hp*cb.CURE_RATIO))
+        )
+        better = active & (~take) & (spell_damage > best_damage)
+        choice[take | better] = offset + i
+        is_weak[take | better] = spell_is_weak
+        best_damage[better] = spell_damage
+        stopped |= take
+    return (choice, is_weak)
+
+def simulateBattles(
+    player : cb.Combatant,
+    enemy : cb.Combatant,
+    player_hp : np.ndarray,
+    player_mana : np.ndarray,
+    rng : np.random.Generator,
+) -> dict[str, np.ndarray]:
+    size = player_hp.shape[0]
+    player_hp = player_hp.astype(np.float64)
+    player_mana = player_mana.astype(np.int64)
+    enemy_hp = np.full(size, enemy.max_hp, dtype=np.float64)
+    enemy_mana = np.full(size, enemy.max_mana, dtype=np.int64)
+    turns = np.zeros(size, dtype=np.int64)
+    active = np.ones(size, dtype=bool)
+    victory = np.zeros(size, dtype=bool)
+
+    player_attacks = player.weapons + player.spells
+    enemy_attacks = enemy.weapons + enemy.spells
+    player_table = _getAttackTable(player_attacks)
+    enemy_table = _getAttackTable(enemy_attacks + [cb.NULL_ATTACK])
+    player_weak = np.array(
+        [attack.is_spell and attack.effect in enemy.weakness for attack in player_attacks]
+    )
+    player_buff = np.array(
+        [cb.hasWeaponBuff(player.type, attack) for attack in player_attacks]
+    )
+    player_factor = cb.getLevelFactor(player.level, enemy.level)
+    enemy_factor = cb.getLevelFactor(enemy.level, player.level)
+
+    for _ in range(MAX_TURNS):
+        if not active.any():
+            break
+        # turno del giocatore
+        choice = _choosePlayerAttacks(player, enemy, player_attacks, player_mana)
+        # senza attacchi disponibili la battaglia finisce, come in combat
+        active &= choice >= 0
+        spell = active & player_table["is_spell"][choice]
+        player_mana[spell] -= player_table["mana"][choice][spell]
+        _cure(player_hp, player.max_hp, active & player_table["is_cure"][choice])
+        player_damage = np.round(
+            _roll(rng, player_table["damage"][choice], player_table["crit"][choice])
+            * player_factor
+            * np.where(player_weak[choice], cb.WEAK_MULT, 1)
+            * np.where(player_buff[choice], cb.BUFF_MULT, 1)
+        )
+        player_damage[player_table["is_cure"][choice]] = 0
+
+        # il nemico sceglie prima di subire i danni
+        enemy_choice, is_weak = _chooseEnemyAttacks(
+            player, enemy, player_hp, enemy_hp, enemy_mana
+        )
+        _cure(enemy_hp, enemy.max_hp, active & enemy_table["is_cure"][enemy_choice])
+        enemy_damage = np.round(
+            _roll(rng, enemy_table["damage"][enemy_choice], enemy_table["crit"][enemy_choice])
+            * enemy_factor
+            * np.where(is_weak, cb.WEAK_MULT, 1)
+        )
+        enemy_damage[enemy_table["is_cure"][enemy_choice]] = 0
+        spell = active & enemy_table["is_spell"][enemy_choice]
+        enemy_mana[spell] -= enemy_table["mana"][enemy_choice][spell]
+
+        # come combat.applyDamage: a parita' di danni e punti vita si muore
+        enemy_dead = active & (enemy_hp <= player_damage)
+        enemy_hp = np.where(active, np.maximum(enemy_hp - player_damage, 0), enemy_hp)
+        hit = active & (~enemy_dead)
+        player_dead = hit & (player_hp <= enemy_damage)
+        player_hp = np.where(hit, np.maximum(player_hp - enemy_damage, 0), player_hp)
+
+        turns[active] += 1
+        victory |= enemy_dead
+        active &= ~(enemy_dead | player_dead)
+
+    return {
+        "victory" : victory,
+        "turns" : turns,
+        "player_hp" : player_hp.astype(np.int64),
+        "player_mana" : player_mana,
+    }
+
+def levelUp(
+    player : cb.Combatant,
+    hp_mult : int | float,
+    mana_mult : int | float,
+) -> None:
+    # come Player.levelUp
+    player.max_hp = max(7, round(player.max_hp + (15 * hp_mult)))
+    player.max_mana = max(1, round(player.max_mana + (2 * mana_mult)))
+    player.level += 1
+
+def getProgression(levels : list[dict]) -> list[tuple[str, list[dict]]]:
+    progression = []
+    for level in levels:
+        if level["class"] != "Level":
+            continue
+        enemies = [
+            character["type"]["args"]
+            for character in level["args"].get("characters", [])
+            if character["type"]["class"] == "Enemy"
+            and character["type"]["args"].get("is_hostile", True)
+        ]
+        progression.append((level["args"]["name"], enemies))
+    return progression
+
+def simulateClass(
+    subplayer : dict,
+    progression : list[tuple[str, list[dict]]],
+    battles : int,
+    rng : np.random.Generator,
+) -> list[dict]:
+    player = cb.Combatant.fromData(subplayer)
+    reached = battles
+    report = []
+    for level_name, enemies in progression:
+        # ogni livello inizia con punti vita e mana pieni
+        player_hp = np.full(reached, player.max_hp)
+        player_mana = np.full(reached, player.max_mana)
+        for enemy_args in enemies:
+            if reached == 0:
+                break
+            enemy = cb.Combatant.fromData(enemy_args)
+            result = simulateBattles(player, enemy, player_hp, player_mana, rng)
+            victory = result["victory"]
+            wins = int(victory.sum())
+            report.append({
+                "level" : level_name,
+                "enemy" : f"{enemy.name} lv. {enemy.level}",
+                "player_level" : player.level,
+                "reached" : reached / battles,
+                "win_rate" : wins / reached,
+                "turns" : float(result["turns"][victory].mean()) if wins else 0,
+                "hp_left" : float(result["player_hp"][victory].mean()) if wins else 0,
+                "max_hp" : player.max_hp,
+            })
+            # solo i vincitori proseguono, con i punti vita rimasti
+            player_hp = result["player_hp"][victory]
+            player_mana = result["player_mana"][victory]
+            reached = wins
+            levelUp(player, subplayer.get("hp_mult", 1), subplayer.get("mana_mult", 1))
+    return report
+
+def main(argv : list[str]) -> None:
+    parser = ArgumentParser(
+        description="Simulazione Monte Carlo delle battaglie di levels.json"
+    )
+    parser.add_argument("--levels", default="./data/levels.json")
+    parser.add_argument("--battles", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.levels) as levels_file:
+        levels = load(levels_file)["levels"]
+    subplayers = [
+        character["type"]["args"]
+        for level in levels if level["class"] == "ClassSelection"
+        for character in level["args"].get("characters", [])
+    ]
+    progression = getProgression(levels)
+    rng = np.random.default_rng(args.seed)
+
+    start = perf_counter()
+    total = 0
+    for subplayer in subplayers:
+        print(f"\n{subplayer['name']} ({subplayer['type']})")
+        print(
+            f"{'livello':<12}{'nemico':<22}{'lv.':>4}{'arrivati':>10}"
+            f"{'vittorie':>10}{'turni':>8}{'PV rimasti':>16}"
+        )
+        for row in simulateClass(subplayer, progression, args.battles, rng):
+            total += round(row["reached"]*args.battles)
+            print(
+                f"{row['level']:<12}{row['enemy']:<22}{row['player_level']:>4}"
+                f"{row['reached']:>10.1%}{row['win_rate']:>10.1%}"
+                f"{row['turns']:>8.2f}"
+                f"{row['hp_left']:>9.1f}/{row['max_hp']:<6}"
+            )
+    elapsed = perf_counter() - start
+    print(f"\n{total} battaglie in {elapsed:.2f} s")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,88 @@
+import pygame
+
+# lato di una cella, in pixel della risoluzione base 512x512
+CELL_SIZE = 64
+
+class SpatialHash:
+    def __init__(
+        self,
+        cell_size : tuple[float, float],
+    ) -> None:
+        self._cell_size = cell_size
+        self._cells : dict[tuple[int, int], dict[int, dict]] = {}
+        self._entries : dict[int, tuple[int, list[tuple[int, int]]]] = {}
+        self._count = 0
+
+    def _getCells(
+        self,
+        rect : pygame.Rect,
+    ) -> list[tuple[int, int]]:
+        left = int(rect.left // self._cell_size[0])
+        right = int((rect.right - 1) // self._cell_size[0])
+        top = int(rect.top // self._cell_size[1])
+        bottom = int((rect.bottom - 1) // self._cell_size[1])
+        return [
+            (x, y)
+            for x in range(left, right + 1)
+            for y in range(top, bottom + 1)
+        ]
+
+    def insert(
+        self,
+        entity : dict,
+        rect : pygame.Rect,
+    ) -> None:
+        key = id(entity)
+        if key in self._entries:
+            order = self._entries[key][0]
+            self.remove(entity)
+        else:
+            order = self._count
+            self._count += 1
+        cells = self._getCells(rect)
+        for cell in cells:
+            self._cells.setdefault(cell, {})[key] = entity
+        self._entries[key] = (order, cells)
+
+    def update(
+        self,
+        entity : dict,
+        rect : pygame.Rect,
+    ) -> None:
+        # si tocca la griglia solo se l'entita' ha cambiato celle
+        entry = self._entries.get(id(entity))
+        if entry is not None and entry[1] == self._getCells(rect):
+            return
+        self.insert(entity, rect)
+
+    def remove(
+        self,
+        entity : dict,
+    ) -> None:
+        key = id(entity)
+        if key not in self._entries:
+            return
+        _, cells = self._entries.pop(key)
+        for cell in cells:
+            bucket = self._cells[cell]
+            del bucket[key]
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self) -> None:
+        self._cells = {}
+        self._entries = {}
+        self._count = 0
+
+    def query(
+        self,
+        rect : pygame.Rect,
+    ) -> list[dict]:
+        found = {}
+        for cell in self._getCells(rect):
+            found.update(self._cells.get(cell, {}))
+        # nello stesso ordine in cui sono state inserite
+        return sorted(
+            found.values(),
+            key=lambda entity: self._entries[id(entity)][0],
+        )
@@ -1,8 +1,11 @@
+from collections import OrderedDict
 from typing import Literal
 
 import pygame
 
 from config import X_RATIO, Y_RATIO, ASSETS_PATH
+import assets as ats
+import atlas as atl
 
 pygame.font.init()
 FONT = pygame.font.Font(f"{ASSETS_PATH}/font/pixel.ttf")
@@ -13,6 +16,192 @@ TEXT_ALIGN = {
     "right" : pygame.FONT_RIGHT,
 }
 
+TextState = Literal["normal", "hover", "disabled", "selected"]
+TextBackend = Literal["font", "glyph"]
+
+GLYPHS = "".join(chr(i) for i in range(32, 127)) + "àèéìòùÀÈÉÌÒÙ"
+
+class GlyphAtlas:
+    def __init__(
+        self,
+        font_color : str,
+        font_size : int,
+        scale_fact : tuple[float, float],
+    ) -> None:
+        FONT.align = TEXT_ALIGN["left"]
+        FONT.point_size = font_size
+        self._line_height = FONT.get_linesize()
+        self._scale_fact = scale_fact
+        glyphs = {
+            glyph : FONT.render(glyph, False, font_color) for glyph in GLYPHS
+        }
+        self._widths = {
+            glyph : surface.get_width() for glyph, surface in glyphs.items()
+        }
+        # SDL_ttf conta anche la larghezza dell'a capo
+        self._newline_width = FONT.size("\n")[0]
+        sheet = pygame.Surface(
+            (
+                sum(self._widths.values()), 
+                max(surface.get_height() for surface in glyphs.values()),
+            ),
+            pygame.SRCALPHA,
+        )
+        rects = {}
+        x = 0
+        for glyph, surface in glyphs.items():
+            sheet.blit(surface, (x, 0))
+            rects[glyph] = [x, 0, surface.get_width(), surface.get_height()]
+            x += surface.get_width()
+        sheet = pygame.transform.scale_by(sheet, scale_fact)
+        self._sheet = ats.convertSurface(sheet)
+        self._glyphs = {
+            glyph : self._sheet.subsurface(
+                atl.scaleRect(rect, scale_fact, self._sheet.get_size())
+            ) for glyph, rect in rects.items()
+        }
+
+    def canRender(
+        self,
+        text : str,
+    ) -> bool:
+        return all((glyph in self._widths) for glyph in text if glyph != "\n")
+
+    def _getWidth(
+        self,
+        line : str,
+    ) -> int:
+        return sum(self._widths[glyph] for glyph in line)
+
+    def _wrap(
+        self,
+        text : str,
+        wrap_length : int,
+    ) -> list[str]:
+        if wrap_length <= 0:
+            # l'a capo finale non aggiunge una riga vuota
+            lines = text.split("\n")
+            return lines[:-1] if len(lines) > 1 and not lines[-1] else lines
+        # come SDL_ttf: la riga prende i caratteri che entrano nella
+        # larghezza, spazi e a capo compresi, e si spezza al primo a capo
+        # o dopo l'ultimo spazio tra questi (a meta' parola se non ce ne sono)
+        lines = []
+        while True:
+            fit = 0
+            width = 0
+            for glyph in text:
+                width += self._newline_width if glyph == "\n" else self._widths[glyph]
+                if width > wrap_length:
+                    break
+                fit += 1
+            fit = max(fit, 1)
+            newline = text.find("\n", 0, fit)
+            if newline >= 0:
+                lines.append(text[:newline])
+                text = text[newline+1:]
+                if not text:
+                    break
+                continue
+            if fit >= len(text):
+                lines.append(text)
+                break
+            end = text.rfind(" ", 0, fit) + 1 or fit
+            lines.append(text[:end])
+            text = text[end:]
+        return lines
+
+    def render(
+        self,
+        text : str,
+        align : Literal["left", "center", "right"],
+        wrap_length : int,
+    ) -> tuple[pygame.Surface, tuple[int, int]]:
+        lines = self._wrap(text, wrap_length)
+        widths = [self._getWidth(line) for line in lines]
+        if wrap_length > 0 and (len(lines) > 1 or align != "left"):
+            width = wrap_length
+        elif len(lines) == 1 and text.endswith("\n"):
+            # su una riga sola SDL_ttf misura anche l'a capo finale
+            width = widths[0] + self._newline_width
+        else:
+            width = max(widths)
+        size = (width, self._line_height*len(lines))
+        surface = pygame.Surface(
+            (int(size[0]*self._scale_fact[0]), int(size[1]*self._scale_fact[1])),
+            pygame.SRCALPHA,
+        )
+        blits = []
+        for i, (line, line_width) in enumerate(zip(lines, widths)):
+            if align == "center":
+                x = width//2 - line_width//2
+            elif align == "right":
+                x = width - line_width
+            else:
+                x = 0
+            y = int(i*self._line_height*self._scale_fact[1])
+            for glyph in line:
+                blits.append(
+                    (self._glyphs[glyph], (int(x*self._scale_fact[0]), y))
+                )
+                x += self._widths[glyph]
+        surface.fblits(blits)
+        return (surface, size)
+
+_glyph_atlases : dict[tuple, GlyphAtlas] = {}
+
+def getGlyphAtlas(
+    font_color : str,
+    font_size : int,
+    scale_fact : tuple[float, float],
+) -> GlyphAtlas:
+    key = (font_color, font_size, scale_fact)
+    if key in _glyph_atlases:
+        return _glyph_atlases[key]
+    glyph_atlas = GlyphAtlas(font_color, font_size, scale_fact)
+    if ats.isDisplayReady():
+        _glyph_atlases[key] = glyph_atlas
+    return glyph_atlas
+
+MAX_RENDERED = 256
+# testi gia' renderizzati, dal meno al piu' recente
+_rendered : OrderedDict[tuple, tuple[pygame.Surface, tuple[int, int]]] = OrderedDict()
+
+def renderText(
+    text : str,
+    font_color : str,
+    font_size : int,
+    align : Literal["left", "center", "right"],
+    wrap_length : int,
+    scale_fact : tuple[float, float],
+    backend : TextBackend = "font",
+) -> tuple[pygame.Surface, tuple[int, int]]:
+    key = (text, font_color, font_size, align, wrap_length, scale_fact, backend)
+    if key in _rendered:
+        _rendered.move_to_end(key)
+        return _rendered[key]
+    # a scale non intere i glifi scalati uno per uno non coincidono
+    # con il testo scalato intero
+    glyph_atlas = (
+        getGlyphAtlas(font_color, font_size, scale_fact) 
+        if backend == "glyph" and ats.isIntegerScale(scale_fact)
+        else None
+    )
+    if glyph_atlas is not None and text and glyph_atlas.canRender(text):
+        surface, size = glyph_atlas.render(text, align, wrap_length)
+    else:
+        FONT.align = TEXT_ALIGN[align]
+        FONT.point_size = font_size
+        surface = FONT.render(text, False, font_color, wraplength=wrap_length)
+        size = surface.get_rect().size
+        surface = pygame.transform.scale_by(surface, scale_fact)
+        surface = ats.convertSurface(surface, alpha=False)
+    # prima del display la superficie non e' ancora convertita
+    if ats.isDisplayReady():
+        _rendered[key] = (surface, size)
+        if len(_rendered) > MAX_RENDERED:
+            _rendered.popitem(last=False)
+    return (surface, size)
+
 class Box:
     def __init__(
         self,
@@ -23,13 +212,18 @@ class Box:
         self._scale_fact = (
             scale_fact*(self._size[0]/254)*X_RATIO, scale_fact*(self._size[1]/105)*Y_RATIO
         )
+        self._assets = ats.AssetGroup()
         self._setBox()
         
     def _setBox(self) -> None:
-        self._box = pygame.image.load(f"{ASSETS_PATH}/dialogue/static.png")
-        self._box = pygame.transform.scale_by(self._box, self._scale_fact)
+        self._box = self._assets.load(
+            f"{ASSETS_PATH}/dialogue/static.png", self._scale_fact
+        )
         self.rect = self._box.get_rect()
 
+    def release(self) -> None:
+        self._assets.release()
+
     def show(
         self, 
         screen : pygame.Surface, 
@@ -49,30 +243,44 @@ class Text:
         align : Literal["left", "center", "right"] = "left",
         scale_fact : int | float = 1,
         wrap : bool = False,
+        palette : dict[TextState, str] | None = None,
+        backend : TextBackend = "font",
     ) -> None:
         if from_file:
             self._path = text
             self.text = self._getText()
         else:
             self.text = text
-        FONT.align = TEXT_ALIGN[align]
-        FONT.point_size = font_size
+        self._font_size = font_size
+        self._align = align
+        self._backend = backend
         if wrap:
             self._wrap_length = 242
         else:
             self._wrap_length = 0
         self._scale_fact = (scale_fact*X_RATIO, scale_fact*Y_RATIO)
-        self._surface = FONT.render(self.text, False, font_color, wraplength=self._wrap_length)
-        self._size = self._surface.get_rect().size
-        self._surface = pygame.transform.scale_by(self._surface, self._scale_fact)
+        # uno stato per colore, renderizzati una volta sola
+        self._palette = {"normal" : font_color}
+        if palette is not None:
+            self._palette.update(palette)
+        self._states = {}
+        for state, color in self._palette.items():
+            self._states[state], self._size = renderText(
+                self.text, color, self._font_size, 
+                self._align, self._wrap_length, self._scale_fact, 
+                self._backend,
+            )
+        self.state = "normal"
+        self._surface = self._states[self.state]
         self.rect = self._surface.get_rect()
 
-    def changeColor(
+    def setState(
         self,
-        new_color : str,
+        state : TextState,
     ) -> None:
-        self._surface = FONT.render(self.text, False, new_color, wraplength=self._wrap_length)
-        self._surface = pygame.transform.scale_by(self._surface, self._scale_fact)
+        if state != self.state:
+            self.state = state
+            self._surface = self._states[state]
 
     def _getText(self) -> str:
         with open(f"{ASSETS_PATH}/dialogue/{self._path}.txt") as text_file:
@@ -105,6 +313,9 @@ class TextBox(Text):
         box_size = (self._size[0]+16, self._size[1]+16)
         self._box = Box(box_size)
 
+    def release(self) -> None:
+        self._box.release()
+
     def show(
         self, 
         screen : pygame.Surface, 
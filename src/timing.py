@@ -0,0 +1,39 @@
+import pygame
+
+# passi di simulazione al secondo, indipendenti dal frame rate
+STEP_FPS = 60
+# oltre questo numero di passi per frame si rallenta invece di saltare
+MAX_STEPS = 5
+
+class FixedStep:
+    def __init__(
+        self,
+        clock : pygame.Clock,
+        step_fps : int = STEP_FPS,
+        max_steps : int = MAX_STEPS,
+    ) -> None:
+        self._clock = clock
+        self._step = 1000 / step_fps
+        self._max_steps = max_steps
+        self._accumulator = 0.0
+        self.alpha = 0.0
+
+    def reset(self) -> None:
+        # il tempo passato a caricare non va simulato
+        self._clock.tick()
+        self._accumulator = 0.0
+        self.alpha = 0.0
+
+    def tick(
+        self,
+        max_fps : int,
+    ) -> int:
+        self._accumulator += self._clock.tick(max_fps)
+        steps = int(self._accumulator // self._step)
+        if steps > self._max_steps:
+            steps = self._max_steps
+            self._accumulator = self._step * steps
+        self._accumulator -= self._step * steps
+        # frazione di passo per interpolare il disegno
+        self.alpha = self._accumulator / self._step
+        return steps
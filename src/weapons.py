@@ -1,12 +1,16 @@
-from random import randint
 from typing import Literal
 
 import pygame
 
 from config import X_RATIO, Y_RATIO, ASSETS_PATH
+import assets as ats
+import combat as cb
+import render as rnd
 import textboxes as tbx
 
 class Weapon:
+	is_spell = False
+
 	def __init__(
 		self, 
 		name : str, 
@@ -28,42 +32,59 @@ class Weapon:
 		self.crit = crit
 		self._max_frames = max_frames
 		self._frame_mult = frame_mult
+		self._assets = ats.AssetGroup()
+		self._attack_assets = ats.AssetGroup()
 		self._setSprites()
 		self._current_frame = 0
 	
 	def _setSprites(self) -> None:
 		if isinstance(self, Spell):
-			self._static = pygame.image.load(f"{self._path}/{self.type}/static/static.png")
+			static_name = f"{self.type}/static/static"
 		else:
-			self._static = pygame.image.load(f"{self._path}/static/static.png")
-		self._static = pygame.transform.scale_by(self._static, self._scale_fact)
+			static_name = "static/static"
+		self._static = self._assets.loadFrame(
+			self._path, static_name, self._scale_fact
+		)
 		self._rect = self._static.get_rect()
+		# i fotogrammi dell'attacco vengono caricati al primo utilizzo
+		self._left_attack = None
+		self._right_attack = None
+
+	def loadAttack(self) -> None:
+		if self._left_attack is not None:
+			return
 		self._left_attack = []
 		self._right_attack = []
 		for i in range(self._max_frames):
 			self._left_attack.append(
-				pygame.image.load(
-					f"{self._path}/left_attack/{i}.png"
+				self._attack_assets.loadFrame(
+					self._path, f"left_attack/{i}", self._scale_fact
 				)
 			)
-			self._left_attack[i] = pygame.transform.scale_by(
-				self._left_attack[i], self._scale_fact
-			)
 			self._right_attack.append(
-				pygame.image.load(
-					f"{self._path}/right_attack/{i}.png"
+				self._attack_assets.loadFrame(
+					self._path, f"right_attack/{i}", self._scale_fact
 				)
 			)
-			self._right_attack[i] = pygame.transform.scale_by(
-				self._right_attack[i], self._scale_fact
-			)
+
+	def releaseAttack(self) -> None:
+		self._attack_assets.release()
+		self._left_attack = None
+		self._right_attack = None
+		self._current_frame = 0
+
+	def release(self) -> None:
+		self.releaseAttack()
+		self._assets.release()
 
 	def attackAnim(
 		self, 
 		screen : pygame.Surface, 
 		rot : Literal["left", "right"], 
+		steps : int = 1,
 	) -> None:
 		if self._current_frame < (self._frame_mult*self._max_frames):
+			self.loadAttack()
 			if rot == "left":
 				self.current_anim = self._left_attack
 				self._rect.center = (357*X_RATIO, 224*Y_RATIO)
@@ -71,20 +92,14 @@ class Weapon:
 				self.current_anim = self._right_attack
 				self._rect.center = (154*X_RATIO, 224*Y_RATIO)
 			screen.blit(self.current_anim[self._current_frame // self._frame_mult], self._rect)
-			self._current_frame += 1
+			self._current_frame += steps
 			return True
 		else:
 			self._current_frame = 0
 			return False
 
 	def attack(self) -> int:
-		crit_prob = randint(1,100)
-		if crit_prob <= self.crit:
-			damage = self.damage * 2
-			self.critical = True
-		else:
-			damage = self.damage
-			self.critical = False
+		damage, self.critical = cb.rollAttack(self)
 		return damage
 
 class PlayerWeapon(Weapon):
@@ -112,18 +127,43 @@ class PlayerWeapon(Weapon):
 		self.crit_text = tbx.Text(
 			f"Crt: {self.crit}%", align="center", font_size=9
 		)
+		self._card = None
+		self.card_rect = pygame.Rect(0, 0, 0, 0)
+
+	def _composeCard(self) -> tuple[pygame.Surface, pygame.Rect]:
+		draw_list = rnd.DrawList()
+		pos = (0, 0)
+		self.box.show(draw_list, pos)
+		self._showStatic(draw_list, (pos[0] - 48, pos[1]))
+		self.name_text.show(draw_list, (pos[0]+8, pos[1] - 12))
+		self._dmg_text.show(draw_list, (pos[0]-16, pos[1]+8))
+		self.crit_text.show(draw_list, (pos[0]+32, pos[1]+8))
+		card, card_rect = draw_list.toSurface()
+		return (ats.convertSurface(card), card_rect)
 
 	def showBox(
 		self, 
 		screen : pygame.Surface, 
 		pos : tuple[int, int],
 	) -> None:
-		self.box.show(screen, pos)
-		self._showStatic(screen, (pos[0] - 48, pos[1]))
-		self.name_text.show(screen, (pos[0]+8, pos[1] - 12))
-		self._dmg_text.show(screen, (pos[0]-16, pos[1]+8))
-		self.crit_text.show(screen, (pos[0]+32, pos[1]+8))
+		# la scheda cambia solo con l'arma, si compone una volta sola
+		if self._card is None:
+			self._card = self._composeCard()
+		card, card_rect = self._card
+		self.card_rect = card_rect.move(pos[0]*X_RATIO, pos[1]*Y_RATIO)
+		screen.blit(card, self.card_rect)
+
+	def hitTest(
+		self,
+		pos : tuple[int, int],
+	) -> bool:
+		return self.card_rect.collidepoint(pos)
 		
+	def release(self) -> None:
+		Weapon.release(self)
+		self.box.release()
+		self._card = None
+
 	def _showStatic(
 		self,
 		screen : pygame.Surface,
@@ -143,6 +183,11 @@ class PlayerWeapon(Weapon):
 		return data
 
 class Spell(Weapon):
+	# animazione comune a tutti gli incantesimi, caricata una volta sola
+	_attack_bank : dict[tuple, tuple[tuple[pygame.Surface, ...], ...]] = {}
+	_bank_assets = ats.AssetGroup()
+	is_spell = True
+
 	def __init__(
 		self, 
 		name : str,
@@ -156,6 +201,31 @@ class Spell(Weapon):
 		self.effect = effect
 		self.mana = mana
 
+	def loadAttack(self) -> None:
+		if self._left_attack is not None:
+			return
+		key = (self._max_frames, self._scale_fact)
+		if key not in Spell._attack_bank:
+			Spell._attack_bank[key] = (
+				tuple(
+					Spell._bank_assets.loadFrame(
+						self._path, f"left_attack/{i}", self._scale_fact
+					) for i in range(self._max_frames)
+				),
+				tuple(
+					Spell._bank_assets.loadFrame(
+						self._path, f"right_attack/{i}", self._scale_fact
+					) for i in range(self._max_frames)
+				),
+			)
+		self._left_attack, self._right_attack = Spell._attack_bank[key]
+
+	def releaseAttack(self) -> None:
+		# la banca condivisa resta in memoria
+		self._left_attack = None
+		self._right_attack = None
+		self._current_frame = 0
+
 class PlayerSpell(Spell):
 	def __init__(
 		self,
@@ -180,6 +250,19 @@ class PlayerSpell(Spell):
 		self._mana_text = tbx.Text(
 			f"Man: {self.mana}", align="center", font_size=9
 		)
+		self._card = None
+		self.card_rect = pygame.Rect(0, 0, 0, 0)
+
+	def _composeCard(self) -> tuple[pygame.Surface, pygame.Rect]:
+		draw_list = rnd.DrawList()
+		pos = (0, 0)
+		self.box.show(draw_list, pos)
+		self._showStatic(draw_list, (pos[0] - 48, pos[1]))
+		self.name_text.show(draw_list, (pos[0]+8, pos[1] - 12))
+		self._dmg_text.show(draw_list, (pos[0]-16, pos[1]+8))
+		self._mana_text.show(draw_list, (pos[0]+32, pos[1]+8))
+		card, card_rect = draw_list.toSurface()
+		return (ats.convertSurface(card), card_rect)
 
 	def showBox(
 		self, 
@@ -187,11 +270,22 @@ class PlayerSpell(Spell):
 		pos : tuple[int, int],
 		battle_size : bool = False,
 	) -> None:
-		self.box.show(screen, pos)
-		self._showStatic(screen, (pos[0] - 48, pos[1]))
-		self.name_text.show(screen, (pos[0]+8, pos[1] - 12))
-		self._dmg_text.show(screen, (pos[0]-16, pos[1]+8))
-		self._mana_text.show(screen, (pos[0]+32, pos[1]+8))
+		if self._card is None:
+			self._card = self._composeCard()
+		card, card_rect = self._card
+		self.card_rect = card_rect.move(pos[0]*X_RATIO, pos[1]*Y_RATIO)
+		screen.blit(card, self.card_rect)
+
+	def hitTest(
+		self,
+		pos : tuple[int, int],
+	) -> bool:
+		return self.card_rect.collidepoint(pos)
+
+	def release(self) -> None:
+		Weapon.release(self)
+		self.box.release()
+		self._card = None
 
 	def _showStatic(
 		self,
@@ -0,0 +1,21 @@
+import os
+import sys
+
+# i test girano senza finestra ne' audio, dalla cartella del progetto:
+# config legge ./key/key.key e ./data relativi alla cartella corrente
+ROOT = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+import pygame
+
+def getBytes(
+    surface : pygame.Surface,
+    format : str = "RGBA",
+) -> bytes:
+    return pygame.image.tobytes(surface, format)
@@ -0,0 +1,44 @@
+import unittest
+from shutil import copytree
+from tempfile import TemporaryDirectory
+
+from conftest import getBytes
+
+import pygame
+
+import assets as ats
+import atlas as atl
+
+# scale non intere di config.json comuni (800, 600 e 384 pixel) e intere
+SCALES = [1.5625, 1.171875, 0.75, (1.5625, 1.171875), 2, 3, (2, 3)]
+
+class AtlasFrameTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = TemporaryDirectory()
+        self._directory = f"{self._tmp.name}/knight"
+        copytree("./assets/sprites/knight", self._directory)
+        atl.buildAtlas(self._directory)
+        self._frames = atl._getFrames(self._directory)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_frames_match_files(self) -> None:
+        for scale_fact in SCALES:
+            group = ats.AssetGroup(ats.SurfaceCache())
+            for name in self._frames:
+                with self.subTest(scale_fact=scale_fact, name=name):
+                    frame = group.loadFrame(self._directory, name, scale_fact)
+                    expected = pygame.transform.scale_by(
+                        pygame.image.load(f"{self._directory}/{name}.png"),
+                        scale_fact,
+                    )
+                    self.assertEqual(frame.get_size(), expected.get_size())
+                    self.assertEqual(getBytes(frame), getBytes(expected))
+                    # a scala intera il fotogramma e' una vista dell'atlante
+                    if ats.isIntegerScale(scale_fact):
+                        self.assertIsNotNone(frame.get_parent())
+            group.release()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import random
+import unittest
+from json import load
+
+import conftest
+
+import characters as ch
+import combat as cb
+import level as lv
+import player as pl
+
+SEEDS = range(20)
+
+class BattleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        with open("./data/levels.json") as levels_file:
+            levels_data = load(levels_file)
+        cls._player_args = levels_data["player"]
+        cls._subplayers = [
+            character["type"]["args"]
+            for level in levels_data["levels"] if level["class"] == "ClassSelection"
+            for character in level["args"]["characters"]
+        ]
+        levels = [
+            level for level in levels_data["levels"] if level["class"] == "Level"
+        ]
+        cls._level = lv.CLASSES["Level"](**levels[0]["args"])
+        cls._enemies = [
+            character["type"]["args"]
+            for level in levels
+            for character in level["args"].get("characters", [])
+            if character["type"]["class"] == "Enemy"
+            and character["type"]["args"].get("is_hostile", True)
+        ]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._level.release()
+
+    def _playBattle(
+        self,
+        subplayer_args : dict,
+        enemy_args : dict,
+    ) -> cb.BattleResult:
+        # gli stessi passi di Level._playBattle, con gli oggetti del gioco
+        player = pl.Player(**self._player_args)
+        subplayer = ch.Subplayer(**subplayer_args)
+        player.setPlayerClass(subplayer)
+        subplayer.release()
+        enemy = ch.Enemy(**enemy_args)
+        turns = 0
+        while (not player.is_dead) and (not enemy.is_dead) and turns < 100:
+            attack = cb.choosePlayerAttack(player, enemy)
+            player_damage, _ = player.getAttackDamage(attack, enemy)
+            _, enemy_damage, _ = self._level._getEnemyAttack(player, enemy)
+            enemy.getDamage(player_damage)
+            if not enemy.is_dead:
+                player.getDamage(enemy_damage)
+            turns += 1
+        result = cb.BattleResult(enemy.is_dead, turns, player.hp, enemy.hp)
+        enemy.release()
+        return result
+
+    def test_simulation_matches_game(self) -> None:
+        for subplayer_args in self._subplayers:
+            for enemy_args in self._enemies:
+                for seed in SEEDS:
+                    with self.subTest(
+                        player=subplayer_args["name"],
+                        enemy=enemy_args["name"],
+                        seed=seed,
+                    ):
+                        random.seed(seed)
+                        simulated = cb.simulateBattle(
+                            cb.Combatant.fromData(subplayer_args),
+                            cb.Combatant.fromData(enemy_args),
+                        )
+                        random.seed(seed)
+                        self.assertEqual(
+                            self._playBattle(subplayer_args, enemy_args),
+                            simulated,
+                        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+from json import load
+
+import numpy as np
+
+import conftest
+
+import combat as cb
+import simulate as sm
+
+SEED = 0
+BATTLES = 20000
+# battaglie giocate una alla volta con combat, piu' lente
+COMBAT_BATTLES = 4000
+
+class SimulateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        with open("./data/levels.json") as levels_file:
+            levels = load(levels_file)["levels"]
+        # una coppia con esito incerto, perche' il confronto dica qualcosa
+        self._player_args = next(
+            character["type"]["args"]
+            for level in levels if level["class"] == "ClassSelection"
+            for character in level["args"]["characters"]
+            if character["type"]["args"]["type"] == "archer"
+        )
+        self._enemy_args = next(
+            enemy
+            for _, enemies in sm.getProgression(levels)
+            for enemy in enemies
+            if enemy["name"] == "Demone" and enemy["level"] == 3
+        )
+
+    def test_batch_matches_combat(self) -> None:
+        player = cb.Combatant.fromData(self._player_args)
+        enemy = cb.Combatant.fromData(self._enemy_args)
+        result = sm.simulateBattles(
+            player, enemy,
+            np.full(BATTLES, player.max_hp),
+            np.full(BATTLES, player.max_mana),
+            np.random.default_rng(SEED),
+        )
+
+        random.seed(SEED)
+        battles = [
+            cb.simulateBattle(
+                cb.Combatant.fromData(self._player_args),
+                cb.Combatant.fromData(self._enemy_args),
+                max_turns = sm.MAX_TURNS,
+            )
+            for _ in range(COMBAT_BATTLES)
+        ]
+        win_rate = sum(battle.victory for battle in battles) / COMBAT_BATTLES
+        turns = sum(battle.turns for battle in battles) / COMBAT_BATTLES
+
+        self.assertGreater(win_rate, 0.1)
+        self.assertLess(win_rate, 0.9)
+        self.assertAlmostEqual(result["victory"].mean(), win_rate, delta=0.03)
+        self.assertAlmostEqual(result["turns"].mean(), turns, delta=0.1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from glob import glob
+
+from conftest import getBytes
+
+import pygame
+
+import textboxes as tbx
+
+TEXTS = [
+    "Il cavaliere errante attraversò la foresta incantata e trovò un "
+    "forziere pieno di monete d'oro, ma un orco lo stava già aspettando "
+    "dietro l'albero più vecchio.",
+    "Man: 25/60",
+    "uno  due\ntre quattro cinque sei sette otto nove dieci undici dodici\n",
+    "supercalifragilistichespiralidoso supercalifragilistichespiralidoso",
+]
+
+class GlyphTextTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+        cls.texts = TEXTS + [
+            open(path).read() for path in glob("./assets/dialogue/*.txt")
+        ]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        pygame.display.quit()
+
+    def _assertSame(
+        self,
+        text : str,
+        font_size : int,
+        align : str,
+        wrap_length : int,
+        scale_fact : tuple[float, float],
+    ) -> None:
+        tbx._rendered.clear()
+        font, expected_size = tbx.renderText(
+            text, "white", font_size, align, wrap_length, scale_fact, "font"
+        )
+        glyph, glyph_size = tbx.renderText(
+            text, "white", font_size, align, wrap_length, scale_fact, "glyph"
+        )
+        self.assertEqual(glyph_size, expected_size)
+        self.assertEqual(glyph.get_size(), font.get_size())
+        self.assertEqual(getBytes(glyph, "RGB"), getBytes(font, "RGB"))
+
+    def test_wrapped_text_matches_font(self) -> None:
+        for text in self.texts:
+            for font_size in (9, 10, 12, 14):
+                for align in ("left", "center", "right"):
+                    for wrap_length in (0, 120, 242):
+                        with self.subTest(
+                            text=text[:20], font_size=font_size, 
+                            align=align, wrap_length=wrap_length,
+                        ):
+                            self._assertSame(
+                                text, font_size, align, wrap_length, (2.0, 2.0)
+                            )
+
+    def test_fractional_scale_matches_font(self) -> None:
+        for text in self.texts:
+            with self.subTest(text=text[:20]):
+                self._assertSame(text, 10, "center", 242, (1.5625, 1.171875))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import conftest
+
+import assets as ats
+import atlas as atl
+import weapons as wp
+
+class WeaponAssetsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = TemporaryDirectory()
+        self._directory = f"{self._tmp.name}/weapons/sword"
+        copytree("./assets/weapons/sword", self._directory)
+        atl.buildAtlas(self._directory, atl.ATLAS_DIRS["weapons/*"])
+        self._max_frames = len(os.listdir(f"{self._directory}/left_attack"))
+        self._patch = mock.patch.object(wp, "ASSETS_PATH", self._tmp.name)
+        self._patch.start()
+        ats.CACHE.clear()
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        ats.CACHE.clear()
+        self._tmp.cleanup()
+
+    def _getHeld(self) -> set[str]:
+        return {key[0] for key, refs in ats.CACHE._refs.items() if refs > 0}
+
+    def test_icon_does_not_load_attack_sheet(self) -> None:
+        weapon = wp.Weapon("Spada", "sword", 5, 10, self._max_frames)
+        loaded = {key[0] for key in ats.CACHE._surfaces}
+        self.assertNotIn(f"{self._directory}/{atl.ATLAS_NAME}.png", loaded)
+        self.assertEqual(
+            self._getHeld(), {f"{self._directory}/static/static.png"}
+        )
+        weapon.loadAttack()
+        self.assertGreater(len(self._getHeld()), 1)
+        weapon.releaseAttack()
+        self.assertEqual(
+            self._getHeld(), {f"{self._directory}/static/static.png"}
+        )
+        weapon.release()
+        self.assertEqual(self._getHeld(), set())
+
+if __name__ == "__main__":
+    unittest.main()